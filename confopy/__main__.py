@@ -15,12 +15,16 @@ import sys
 sys.path.append(op.split(op.dirname(op.realpath(__file__)))[:-1][0])
 
 import argparse as AP
+import cProfile
 
 import confopy.config as C
+from confopy import instrument
 from confopy.pdfextract import *
 from confopy.model import DocumentConverter
+from confopy.model.collection import DocumentCollection
+from confopy.model.binary import BINARY_SUFFIX, dump_documents, load_documents
 from confopy.model.validate import validate
-from confopy.analysis import Analyzer
+from confopy.analysis import Analyzer, ReferenceValues, SpellChecker
 
 from confopy.localization import load_language
 
@@ -53,46 +57,111 @@ def test(args):
     #if ind < len(pages):
     #    pages[ind]._print()
 
+def document_cache(args):
+    """Returns the DocumentCache to use or None if caching is disabled.
+    """
+    if args.no_cache:
+        return None
+    return DocumentCache()
+
 def pdf2xml(args, output=""):
     dc = DocumentConverter()
+    cache = document_cache(args)
+    if args.binary:
+        # Written directly to the output file one Document at a time
+        if args.outfile == "":
+            return "Error: --binary needs an output file (-o)!"
+        with instrument.span("to_binary"):
+            dump_documents(PDFs2documents_iter(args.files, args.jobs, cache), args.outfile)
+        return None
+
+    if args.outfile != "":
+        # Streamed to the output file one Document at a time
+        docs = PDFs2documents_iter(args.files, args.jobs, cache)
+        if len(args.files) == 1:
+            docs = next(docs)
+        with open(args.outfile, "wb") as f:
+            with instrument.span("write_XML"):
+                dc.write_XML(docs, f, pretty=True)
+        return None
+
     doc = None
-    if len(args.files) == 1:
-        doc = PDF2document(args.files[0])
-    elif len(args.files) > 1:
-        doc = PDFs2documents(args.files)
+    with instrument.span("documents"):
+        if len(args.files) == 1:
+            doc = PDF2document(args.files[0], cache)
+        elif len(args.files) > 1:
+            doc = PDFs2documents(args.files, args.jobs, cache)
 
     if doc:
-        output = dc.to_XML(doc, pretty=True)
+        with instrument.span("to_XML"):
+            output = dc.to_XML(doc, pretty=True)
     return output
 
+def documents(args):
+    """Yields the Documents of all input files (PDF, Confopy XML or
+    binary) in the given order. Files are converted or parsed on demand,
+    so only a few Documents are held in memory at a time.
+    """
+    files = [f for f in args.files if op.isfile(f)]
+    pdfs = [f for f in files if f.lower().endswith(PDF_SUFFIX)]
+    pdf_docs = PDFs2documents_iter(pdfs, args.jobs, document_cache(args))
+    for f in files:
+        if f.lower().endswith(PDF_SUFFIX):
+            yield next(pdf_docs)
+        elif f.lower().endswith(XML_SUFFIX):
+            # Parsed one <document> at a time
+            for doc in DocumentCollection(f):
+                yield doc
+        elif f.lower().endswith(BINARY_SUFFIX):
+            for doc in load_documents(f):
+                yield doc
+
 def report(args, output=""):
-    # Convert files to Documents
-    dc = DocumentConverter()
-    docs = list()
-    for f in args.files:
-        if op.isfile(f):
-            if f.lower().endswith(PDF_SUFFIX):
-                doc = PDF2document(f)
-                docs.append(doc)
-            elif f.lower().endswith(XML_SUFFIX):
-                docs.extend(dc.to_Documents(f))
+    # Documents are converted while the report consumes them
+    docs = documents(args)
 
     # Fetch and execute report
-    load_language(args.language)
+    with instrument.span("load_language"):
+        load_language(args.language)
     analyzer = Analyzer.instance()
     rep = analyzer.get(report=args.report)
     if rep:
-        output += rep.execute(docs, args)
+        with instrument.span("report." + args.report):
+            output += rep.execute(docs, args)
         pass
     else:
         output += 'No report named "%s" available!' % args.report
     return output
 
 
+def refvalues(args, output=""):
+    """Computes and stores the metric values of the reference corpora.
+    """
+    load_language(args.language)
+    analyzer = Analyzer.instance(args.language)
+    metrics = [m for (_, m) in sorted(analyzer.metrics().items())]
+    buf = list()
+    for (ID, corp) in sorted(analyzer.corpora().items()):
+        values = ReferenceValues.instance(corp).build(metrics)
+        buf.append("Reference values for corpus \"%s\":" % ID)
+        for m in metrics:
+            buf.append("  %s %.2f" % (m.ID.ljust(20), values[m.ID]))
+    output += "\n".join(buf)
+    return output
+
+
 """ MAIN
 """
 def main(args):
     output = ""
+    profiler = None
+    if C.SPELLCHECK_CACHE_PERSIST:
+        SpellChecker.enable_persistence(C.CACHE_DIR)
+    if args.profile:
+        instrument.enable(memory=args.profile_memory)
+    if args.cprofile != "":
+        profiler = cProfile.Profile()
+        profiler.enable()
 
     if args.reportlist:
         load_language(args.language, True)
@@ -110,30 +179,52 @@ def main(args):
         output = analyzer.rulelist(args.language)
 
     elif args.validate:
-        output = validate(args.files)
+        output = validate(args.files, args.jobs)
 
     elif args.xml:
         output = pdf2xml(args)
 
+    elif args.refvalues:
+        output = refvalues(args)
+
     elif args.report is not "":
         output = report(args)
 
+    SpellChecker.save_all()
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+    if args.profile:
+        sys.stderr.write(instrument.summary() + "\n")
 
-    # Write output
-    if args.outfile is not "":
-        with open(args.outfile, "w") as f:
-            f.write(output.encode("utf8"))
-            f.write("\n".encode("utf8"))
+    # Write output (None: already written to the output file)
+    if output is None:
+        pass
+    elif args.outfile != "":
+        with open(args.outfile, "w", encoding="utf8") as f:
+            f.write(output)
+            f.write("\n")
     else:
-        sys.stdout.write(output.encode("utf8"))
-        sys.stdout.write("\n".encode("utf8"))
+        sys.stdout.write(output)
+        sys.stdout.write("\n")
 
 
-if __name__ == "__main__":
+def run(argv=None):
+    """Parses the command line arguments and runs Confopy.
+    Args:
+        argv: List of arguments. Default: sys.argv[1:]
+    """
     parser = AP.ArgumentParser(description="Language and structure checker for scientific documents.")
     parser.add_argument("files", metavar="file",
                         type=str, nargs="*",
-                        help="Document file to analyze (PDF).")
+                        help="Document file to analyze (PDF, Confopy XML or binary).")
+    parser.add_argument("-b", "--binary",
+                        action="store_true", default=False,
+                        help="Used with -x: writes the documents in the compact binary format (%s) to the output file instead of XML. Reports read such files, too." % BINARY_SUFFIX)
+    parser.add_argument("-j", "--jobs",
+                        type=int, default=1,
+                        help="Number of processes converting PDF files (or validating XML files) in parallel. 0 uses all CPU cores. Default: 1")
     parser.add_argument("-l", "--language",
                         type=str, default=C.DEFAULT_LANG,
                         help="Language to use for PDF extraction and document analysis. Default: " + C.DEFAULT_LANG)
@@ -143,15 +234,30 @@ if __name__ == "__main__":
     parser.add_argument("-ml", "--metriclist",
                         action="store_true", default=False,
                         help="Lists all available metrics by language and exits.")
+    parser.add_argument("-nc", "--no-cache",
+                        action="store_true", default=False,
+                        help="Always extract PDF files anew instead of using the document cache.")
     parser.add_argument("-o", "--outfile",
                         type=str, default="",
                         help="File to write the output too. Default: terminal (stdout).")
+    parser.add_argument("-p", "--profile",
+                        action="store_true", default=False,
+                        help="Prints the time spent in each processing stage, metric and rule to stderr.")
+    parser.add_argument("-pm", "--profile-memory",
+                        action="store_true", default=False,
+                        help="Used with -p: also traces the memory allocated in each stage. Slows down the run considerably.")
+    parser.add_argument("-pc", "--cprofile",
+                        type=str, default="",
+                        help="Writes cProfile statistics of the run to the given file (see pstats).")
     parser.add_argument("-r", "--report",
                         type=str, default="",
                         help="Analyses the given document according to the specified report.")
     parser.add_argument("-rl", "--reportlist",
                         action="store_true", default=False,
                         help="Lists all available reports by language and exits.")
+    parser.add_argument("-rv", "--refvalues",
+                        action="store_true", default=False,
+                        help="Computes and stores the metric values of the reference corpora used by reports.")
     parser.add_argument("-ul", "--rulelist",
                         action="store_true", default=False,
                         help="Lists all rules and exits.")
@@ -161,5 +267,9 @@ if __name__ == "__main__":
     parser.add_argument("-x", "--xml",
                         action="store_true", default=False,
                         help="Converts the PDF file(s) to Confopy XML (structure orientated).")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     main(args)
+
+
+if __name__ == "__main__":
+    run()
@@ -109,6 +109,11 @@ class Analyzer(object):
         return {k: self._reports[k] for k in self._reports}
         #return {k: self._reports[k] for k in self._reports if self._reports[k].language == lang}
 
+    def corpora(self):
+        """Yields all registered corpora.
+        """
+        return {k: self._corpora[k] for k in self._corpora}
+
     def _languages(self, dictionary):
         """Returns a list of unique ISO 639-1 language codes denoting
             all languages supported by Localizable objects in the passed dict.
@@ -217,4 +222,22 @@ Reports for language "de":
     assert analyzer.reportlist("de") == expected_reportlist
     assert analyzer.reportlist() == expected_reportlist
 
+    print("  Testing metric spans...")
+    from confopy import instrument
+    class _LengthMetric(Metric):
+        def __init__(self):
+            super(_LengthMetric, self).__init__("length", "de")
+        def evaluate(self, node):
+            return float(len(node))
+    length = _LengthMetric()
+    analyzer.register(length)
+    assert length.evaluate("abc") == 3.0
+    instrument.enable()
+    length.evaluate("abc")
+    Analyzer.instance("de").get(metric="length").evaluate("ab")
+    instrument.disable()
+    assert instrument.spans()["metric.length"][0] == 2
+    assert "evaluate" not in length.__dict__
+    instrument.reset()
+
     print("Passed all tests!")
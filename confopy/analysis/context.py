@@ -0,0 +1,357 @@
+# coding: utf-8
+'''
+File: context.py
+Author: Oliver Zscheyge
+Description:
+    Per node analysis context sharing tokenization, tagging and
+    lemmatization results between metrics.
+'''
+
+from collections import Counter
+from weakref import WeakKeyDictionary, ref
+
+from nltk import wordpunct_tokenize
+
+from confopy import instrument
+from confopy.analysis.corpus import Corpus, NO_WORDS
+
+
+class AnalysisContext(object):
+    """Lazily computes and stores the linguistic data of a Node that
+    is needed by metrics (words, sentences, POS tags, lemmata).
+    Each stage is computed at most once per node. Use
+    AnalysisContext.of(node, ...) to obtain the shared context of a node.
+    The context is recreated once the text of the node changes.
+    Nodes analyzed with a different corpus or lemmatizer get separate
+    contexts.
+    """
+
+    _contexts = WeakKeyDictionary()
+
+    @staticmethod
+    def of(node, corpus=None, lemmatizer=None):
+        """Yields the shared AnalysisContext of a node.
+        Args:
+            node:       The Node (or Corpus) to analyze.
+            corpus:     Corpus providing the sentence tokenizer and tagger.
+            lemmatizer: Function mapping a word to its lemma.
+        Return:
+            AnalysisContext instance.
+        """
+        contexts = AnalysisContext._contexts.get(node, None)
+        if contexts is None:
+            contexts = dict()
+            AnalysisContext._contexts[node] = contexts
+        key = (corpus, lemmatizer)
+        ctx = contexts.get(key, None)
+        if ctx is None or ctx.revision != node.revision():
+            ctx = AnalysisContext(node, corpus, lemmatizer)
+            contexts[key] = ctx
+        return ctx
+
+    @staticmethod
+    def clear():
+        """Forgets all shared contexts.
+        """
+        AnalysisContext._contexts.clear()
+
+    def __init__(self, node, corpus=None, lemmatizer=None):
+        """Initializer.
+        Args:
+            node:       The Node (or Corpus) to analyze.
+            corpus:     Corpus providing the sentence tokenizer and tagger.
+            lemmatizer: Function mapping a word to its lemma.
+        """
+        super(AnalysisContext, self).__init__()
+        # Weak reference: contexts are values of a WeakKeyDictionary keyed
+        # by their node, a strong one would keep every analyzed Document
+        # alive
+        self._node = ref(node)
+        self.revision = node.revision()
+        self.corpus = corpus
+        self.lemmatizer = lemmatizer
+        self._memo = dict()
+
+    @property
+    def node(self):
+        """The analyzed Node (or Corpus).
+        """
+        return self._node()
+
+    def memo(self, key, constructor):
+        """Returns the value stored under key. Calls constructor to
+        compute the value if it is not known yet.
+        Args:
+            key:         Hashable key of the value.
+            constructor: Function without arguments computing the value.
+        """
+        if key not in self._memo:
+            self._memo[key] = constructor()
+        return self._memo[key]
+
+    def words(self, own=False):
+        """List of all words (including punctuation) of the node.
+        Args:
+            own: Only include the text of the node itself, not the
+                 text of its children.
+        """
+        if own:
+            return self.memo("own_words", self.node.own_words)
+        return self.memo("words", self.node.words)
+
+    def filtered_words(self):
+        """List of all words of the node without NO_WORDS.
+        """
+        return self.memo("filtered_words",
+                         lambda: [w for w in self.words() if w not in NO_WORDS])
+
+    def sents(self, own=False):
+        """List of sentences (lists of words) of the node.
+        Args:
+            own: Only include the text of the node itself.
+        """
+        def constructor():
+            tokenizer = None
+            if self.corpus is not None:
+                tokenizer = self.corpus.sent_tokenizer()
+            with instrument.span("sentences"):
+                if not own:
+                    return self.node.sents(tokenizer=tokenizer)
+                if tokenizer is None:
+                    return list()
+                return [wordpunct_tokenize(s) for s in tokenizer.tokenize(self.node.text)]
+        return self.memo(("sents", own), constructor)
+
+    def tagged_words(self, own=False):
+        """List of (word, POS tag) tuples of the node.
+        Args:
+            own: Only include the text of the node itself.
+        """
+        def constructor():
+            if self.corpus is None:
+                return [(w, None) for w in self.words(own)]
+            words = self.words(own)
+            with instrument.span("tagging"):
+                return self.corpus.tag(words)
+        return self.memo(("tagged_words", own), constructor)
+
+    def lemmata(self, own=False):
+        """List of lemmata, one for each entry of tagged_words.
+        Only verbs get lemmatized, all other words are kept as is.
+        Args:
+            own: Only include the text of the node itself.
+        """
+        def constructor():
+            lemmata = list()
+            for (w, tag) in self.tagged_words(own):
+                if self.lemmatizer is not None and tag and tag.startswith("V"):
+                    lemmata.append(self.lemmatizer(w))
+                else:
+                    lemmata.append(w)
+            return lemmata
+        return self.memo(("lemmata", own), constructor)
+
+
+    # Token statistics shared by metrics. They are mergeable: the
+    # statistics of a document node combine the statistics of its own text
+    # with the ones of its children (bottom-up), so evaluating a document
+    # also yields the statistics of all its sections and paragraphs.
+    # Corpora are evaluated on their whole text. Sentences are not merged,
+    # a sentence may span several paragraphs.
+
+    def _parts(self):
+        """Child nodes whose statistics are merged into the ones of this
+        node or None if the statistics get computed on the whole text.
+        """
+        if isinstance(self.node, Corpus):
+            return None
+        return self.node.children()
+
+    def _aggregate(self, key, compute, merge):
+        """Memoizes a mergeable statistic of the node.
+        Args:
+            key:     Memo key of the statistic.
+            compute: Function (context, own) computing the statistic.
+            merge:   Function adding the second statistic to the first
+                     one (in place) and returning the first one.
+        """
+        def constructor():
+            parts = self._parts()
+            if parts is None:
+                return compute(self, False)
+            value = compute(self, True)
+            for c in parts:
+                ctx = AnalysisContext.of(c, self.corpus, self.lemmatizer)
+                value = merge(value, ctx._aggregate(key, compute, merge))
+            return value
+        return self.memo(key, constructor)
+
+    def word_counts(self):
+        """Counter mapping each word (including punctuation) to its
+        number of occurrences.
+        """
+        return self._aggregate("word_counts", _count_words, _merge_counters)
+
+    def filtered_word_counts(self):
+        """Counter of word occurrences without NO_WORDS.
+        """
+        def constructor():
+            counts = Counter(self.word_counts())
+            for w in NO_WORDS:
+                del counts[w]
+            return counts
+        return self.memo("filtered_word_counts", constructor)
+
+    def lower_word_counts(self):
+        """Counter of lower cased word occurrences.
+        """
+        def constructor():
+            counts = Counter()
+            for (w, n) in self.word_counts().items():
+                counts[w.lower()] += n
+            return counts
+        return self.memo("lower_word_counts", constructor)
+
+    def sent_lengths(self):
+        """List of the number of words (without NO_WORDS) per sentence of
+        the whole text of the node.
+        """
+        return self.memo("sent_lengths", lambda: _sent_lengths(self, False))
+
+    def tag_counts(self):
+        """Counter mapping each POS tag to its number of occurrences.
+        """
+        return self._aggregate("tag_stats", _tag_stats, _merge_tag_stats)[0]
+
+    def verb_counts(self):
+        """Counter of (word, lemma) tuples of all words tagged as verbs.
+        """
+        return self._aggregate("tag_stats", _tag_stats, _merge_tag_stats)[1]
+
+    def lemma_set(self):
+        """Set of lemmata of all words except NO_WORDS.
+        """
+        return self._aggregate("tag_stats", _tag_stats, _merge_tag_stats)[2]
+
+
+def _count_words(ctx, own):
+    return Counter(ctx.words(own))
+
+def _merge_counters(a, b):
+    a.update(b)
+    return a
+
+def _sent_lengths(ctx, own):
+    return [len([w for w in s if w not in NO_WORDS]) for s in ctx.sents(own)]
+
+def _tag_stats(ctx, own):
+    tag_counts = Counter()
+    verb_counts = Counter()
+    lemma_set = set()
+    for ((w, tag), lemma) in zip(ctx.tagged_words(own), ctx.lemmata(own)):
+        tag_counts[tag] += 1
+        if tag and tag.startswith("V"):
+            verb_counts[(w, lemma)] += 1
+        if w not in NO_WORDS:
+            lemma_set.add(lemma)
+    return (tag_counts, verb_counts, lemma_set)
+
+def _merge_tag_stats(a, b):
+    a[0].update(b[0])
+    a[1].update(b[1])
+    a[2].update(b[2])
+    return a
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+    import re
+    from confopy.model.document import Document, Paragraph
+
+    class _Tagger(object):
+        def __init__(self):
+            self.calls = 0
+        def tag(self, words):
+            self.calls += 1
+            return [(w, "VVFIN" if w.endswith("t") else "NN") for w in words]
+
+    class _SentTokenizer(object):
+        def tokenize(self, text):
+            return [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s != ""]
+
+    class _Corpus(object):
+        def __init__(self, sent_tokenizer=None):
+            self._tagger = _Tagger()
+            self._sent_tokenizer = sent_tokenizer
+        def tagger(self, include_edgelabels=True):
+            return self._tagger
+        def tag(self, words):
+            return self._tagger.tag(words)
+        def sent_tokenizer(self):
+            return self._sent_tokenizer
+
+    print("  Building test document...")
+    doc = Document()
+    doc.add_child(Paragraph(text="Der Hase springt, der Fuchs lacht."))
+    corp = _Corpus()
+
+    print("  Testing shared contexts...")
+    upper = lambda w: w.upper()
+    ctx = AnalysisContext.of(doc, corp, upper)
+    assert AnalysisContext.of(doc, corp, upper) is ctx
+    assert AnalysisContext.of(doc) is not ctx
+    assert AnalysisContext.of(doc, corp) is not ctx
+    assert len(ctx.words()) == 8
+    assert ctx.filtered_words() == ["Der", "Hase", "springt", "der", "Fuchs", "lacht"]
+    assert ctx.sents() == []
+
+    print("  Testing tagging and lemmata...")
+    assert ctx.lemmata() == ["Der", "Hase", "SPRINGT", ",", "der", "Fuchs", "LACHT", "."]
+    ctx.tagged_words()
+    assert corp.tagger().calls == 1
+
+    print("  Testing token statistics...")
+    assert ctx.word_counts()["der"] == 1
+    assert ctx.filtered_word_counts()[","] == 0
+    assert ctx.lower_word_counts()["der"] == 2
+    assert ctx.tag_counts()["VVFIN"] == 2
+    assert ctx.verb_counts()[("lacht", "LACHT")] == 1
+    assert "SPRINGT" in ctx.lemma_set() and "," not in ctx.lemma_set()
+
+    print("  Testing bottom-up merging...")
+    calls = corp.tagger().calls
+    para_ctx = AnalysisContext.of(doc.children()[0], corp, upper)
+    assert para_ctx.tag_counts() == ctx.tag_counts()
+    assert para_ctx.word_counts() == ctx.word_counts()
+    assert corp.tagger().calls == calls
+
+    doc.add_child(Paragraph(text="Ende."))
+    ctx2 = AnalysisContext.of(doc, corp)
+    assert ctx2 is not ctx
+    assert len(ctx2.words()) == 10
+
+    AnalysisContext.clear()
+    assert AnalysisContext.of(doc, corp) is not ctx2
+
+    print("  Testing sentences spanning paragraphs...")
+    sent_corp = _Corpus(_SentTokenizer())
+    sent_doc = Document()
+    sent_doc.add_child(Paragraph(text="Der Hase springt"))
+    sent_doc.add_child(Paragraph(text="sehr weit. Ende."))
+    baseline = [len([w for w in s if w not in NO_WORDS])
+                for s in sent_doc.sents(tokenizer=sent_corp.sent_tokenizer())]
+    assert baseline == [5, 1]
+    assert AnalysisContext.of(sent_doc, sent_corp).sent_lengths() == baseline
+    assert AnalysisContext.of(sent_doc.children()[0], sent_corp).sent_lengths() == [3]
+    assert AnalysisContext.of(sent_doc.children()[1], sent_corp).sent_lengths() == [2, 1]
+    sent_doc = sent_corp = None
+
+    print("  Testing release of analyzed documents...")
+    import gc
+    AnalysisContext.of(doc.children()[0], corp).tag_counts()
+    doc = ctx = ctx2 = para_ctx = None
+    gc.collect()
+    assert len(AnalysisContext._contexts) == 0
+
+    print("Passed all tests!")
@@ -54,6 +54,30 @@ class Corpus(Localizable, CorpusReader, Document):
         """
         return None
 
+    def tag(self, words):
+        """Tags a list of words using the POS tagger.
+        Args:
+            words: List of words (unicode strings).
+        Return:
+            List of (word, tag) tuples.
+        """
+        return self.tagger().tag(words)
+
+    def tag_sents(self, sents):
+        """Tags each sentence of a list of sentences on its own.
+        Args:
+            sents: List of sentences (lists of words).
+        Return:
+            List of lists of (word, tag) tuples.
+        """
+        return [self.tag(s) for s in sents]
+
+    def clear_cache(self):
+        """Empties the caches filled while tagging or parsing, e.g. to
+        time these steps without previous results.
+        """
+        pass
+
     def parser(self):
         """Returns the syntax tree parser.
         """
@@ -69,3 +93,15 @@ class Corpus(Localizable, CorpusReader, Document):
         """
         return list()
 
+    def stamp(self):
+        """Returns a value identifying the current state of the corpus data,
+        e.g. the size and modification time of the corpus file.
+        """
+        return None
+
+    def reference_file(self):
+        """Returns the path of the file storing precomputed metric values
+        of the corpus or None if they should not be stored.
+        """
+        return None
+
@@ -0,0 +1,110 @@
+# coding: utf-8
+'''
+File: lrucache.py
+Author: Oliver Zscheyge
+Description:
+    Bounded mapping evicting the least recently used entries.
+'''
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """Mapping holding at most maxsize entries. Once full, inserting a new
+    entry evicts the least recently used one.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=1024):
+        """Initializer.
+        Args:
+            maxsize: Maximum number of entries.
+        """
+        super(LRUCache, self).__init__()
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        """Returns the value of key (marking it as recently used) or
+        default if key is not cached.
+        """
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            return default
+        self._entries[key] = value
+        return value
+
+    def put(self, key, value):
+        """Stores value under key and evicts the least recently used
+        entries if the cache is full.
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def memo(self, key, constructor):
+        """Returns the value of key. Calls constructor(key) to compute
+        and store the value if it is not cached.
+        """
+        value = self.get(key, LRUCache._MISSING)
+        if value is LRUCache._MISSING:
+            value = constructor(key)
+            self.put(key, value)
+        return value
+
+    def items(self):
+        """List of (key, value) tuples from least to most recently used.
+        """
+        return list(self._entries.items())
+
+    def update(self, items):
+        """Stores all (key, value) tuples of items in the given order.
+        """
+        for (key, value) in items:
+            self.put(key, value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+
+    print("  Testing get and put...")
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.items() == [("a", 1), ("c", 3)]
+    assert cache.get("b", 0) == 0
+    assert len(cache) == 2
+
+    print("  Testing memo...")
+    calls = list()
+    def square(x):
+        calls.append(x)
+        return x * x
+    cache = LRUCache(3)
+    assert cache.memo(4, square) == 16
+    assert cache.memo(4, square) == 16
+    assert calls == [4]
+
+    print("  Testing update...")
+    cache.update([(1, 1), (2, 4), (3, 9)])
+    assert cache.items() == [(1, 1), (2, 4), (3, 9)]
+    cache.clear()
+    assert len(cache) == 0
+
+    print("Passed all tests!")
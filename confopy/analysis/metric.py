@@ -7,7 +7,12 @@ Description:
     Metrics.
 '''
 
+from functools import wraps
+from hashlib import sha1
+from types import CodeType
+
 from .localizable import Localizable
+from confopy import instrument
 
 #import nltk
 #
@@ -21,13 +26,59 @@ from .localizable import Localizable
 
 class Metric(Localizable):
     """Superclass for all Metrics.
+    Stored reference values (see ReferenceValues) are recomputed when the
+    revision of a metric changes. Changes of the code of evaluate are
+    detected automatically. Increase the version of a metric whenever its
+    results change otherwise, e.g. through its word lists or the
+    statistics of AnalysisContext it uses.
     """
+
+    version = 1
+
+    def __init_subclass__(cls, **kwargs):
+        # Evaluations are measured as instrument spans "metric.<ID>"
+        super(Metric, cls).__init_subclass__(**kwargs)
+        evaluate = cls.__dict__.get("evaluate", None)
+        if evaluate is not None:
+            cls.evaluate = _measured(evaluate)
+
     def __init__(self, ID, language, brief="", description=""):
         super(Metric, self).__init__(ID=ID, language=language, brief=brief, description=description)
 
     def evaluate(self, node):
         return 0.0
 
+    def revision(self):
+        """Identifies the results of the metric.
+        Return:
+            Tuple of the version and a hash of the code of evaluate.
+        """
+        evaluate = type(self).evaluate
+        evaluate = getattr(evaluate, "__wrapped__", evaluate)
+        return (self.version, sha1(_code_key(evaluate.__code__).encode("utf-8")).hexdigest())
+
+
+def _code_key(code):
+    # Independent of line numbers and of the string hash seed
+    consts = list()
+    for c in code.co_consts:
+        if isinstance(c, CodeType):
+            consts.append(_code_key(c))
+        elif isinstance(c, frozenset):
+            consts.append(repr(sorted(c, key=repr)))
+        else:
+            consts.append(repr(c))
+    return repr((code.co_code, code.co_names, consts))
+
+def _measured(evaluate):
+    @wraps(evaluate)
+    def wrapper(self, node):
+        if not instrument.is_enabled():
+            return evaluate(self, node)
+        with instrument.span("metric." + self.ID):
+            return evaluate(self, node)
+    return wrapper
+
 
 
 #def nltk_test():
@@ -0,0 +1,212 @@
+# coding: utf-8
+'''
+File: reference.py
+Author: Oliver Zscheyge
+Description:
+    Precomputed metric values of reference corpora.
+'''
+
+import os
+from pickle import dump, load
+
+
+class ReferenceValues(object):
+    """Metric values of a reference corpus. The values are computed once
+    and stored in a file next to the corpus caches (see
+    Corpus#reference_file). A stored value is recomputed when the corpus
+    data (see Corpus#stamp) or the revision of the metric (see
+    Metric#revision) changes. Newly computed values are stored by #save.
+    """
+
+    _instances = dict()
+
+    @staticmethod
+    def instance(corpus):
+        """Yields the shared ReferenceValues instance of a corpus.
+        Args:
+            corpus: The reference Corpus.
+        Return:
+            ReferenceValues instance.
+        """
+        refvals = ReferenceValues._instances.get(corpus.ID, None)
+        if refvals is None or refvals.corpus is not corpus:
+            refvals = ReferenceValues(corpus)
+            ReferenceValues._instances[corpus.ID] = refvals
+        return refvals
+
+    def __init__(self, corpus, filepath=None):
+        """Initializer.
+        Args:
+            corpus:   The reference Corpus to evaluate metrics on.
+            filepath: File to store the values in. Default: the
+                      reference file of the corpus. No values get
+                      stored if both are None.
+        """
+        super(ReferenceValues, self).__init__()
+        self.corpus = corpus
+        self.filepath = filepath
+        if self.filepath is None:
+            self.filepath = corpus.reference_file()
+        self._stamp = None
+        self._values = None
+        self._dirty = False
+
+    def _load(self):
+        """Reads the stored values. Values stored for different corpus
+        data are discarded.
+        """
+        self._stamp = self.corpus.stamp()
+        self._values = dict()
+        self._dirty = False
+        if self.filepath is None:
+            return
+        try:
+            with open(self.filepath, "rb") as f:
+                data = load(f)
+            if data.get("stamp") == self._stamp:
+                self._values = data.get("values", dict())
+        except Exception:
+            # Missing or unreadable file: start over
+            pass
+
+    def save(self):
+        """Stores the values computed since the last call.
+        """
+        if not self._dirty or self.filepath is None:
+            return
+        self._dirty = False
+        data = {"stamp": self._stamp, "values": self._values}
+        tmp_path = "%s.%d.tmp" % (self.filepath, os.getpid())
+        try:
+            with open(tmp_path, "wb") as f:
+                dump(data, f, -1)
+            os.rename(tmp_path, self.filepath)
+        except (IOError, OSError):
+            print("Could not store reference values to %s" % self.filepath)
+
+    def _evaluate(self, metric):
+        self._values[metric.ID] = (metric.revision(), metric.evaluate(self.corpus))
+        self._dirty = True
+
+    def get(self, metric):
+        """Returns the value of a metric for the reference corpus.
+        Computes the value if it is not known (or outdated). Call #save
+        afterwards to store newly computed values.
+        Args:
+            metric: The Metric.
+        Return:
+            The metric value (float).
+        """
+        if self._values is None:
+            self._load()
+        entry = self._values.get(metric.ID, None)
+        if entry is None or entry[0] != metric.revision():
+            self._evaluate(metric)
+        return self._values[metric.ID][1]
+
+    def get_all(self, metrics):
+        """Like #get for several metrics. Stores newly computed values
+        once at the end.
+        Args:
+            metrics: List of Metrics.
+        Return:
+            List of metric values (floats).
+        """
+        values = [self.get(m) for m in metrics]
+        self.save()
+        return values
+
+    def build(self, metrics):
+        """(Re)computes and stores the values of the given metrics.
+        Args:
+            metrics: List of Metrics.
+        Return:
+            Dict mapping metric IDs to values.
+        """
+        self._load()
+        for m in metrics:
+            self._evaluate(m)
+        self.save()
+        return {m.ID: self._values[m.ID][1] for m in metrics}
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+    import shutil
+    import tempfile
+    from confopy.analysis.corpus import Corpus
+    from confopy.analysis.metric import Metric
+
+    class _Corpus(Corpus):
+        def __init__(self, filepath):
+            super(_Corpus, self).__init__("TEST", "de")
+            self.filepath = filepath
+            self.data = 1
+        def stamp(self):
+            return self.data
+        def reference_file(self):
+            return self.filepath
+
+    class _Metric(Metric):
+        def __init__(self):
+            super(_Metric, self).__init__("test", "de")
+            self.calls = 0
+        def evaluate(self, node):
+            self.calls += 1
+            return node.data * 2.0
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        corp = _Corpus(os.path.join(tmp_dir, "refvals.pkl"))
+        metric = _Metric()
+
+        print("  Testing computation and storage...")
+        refvals = ReferenceValues(corp)
+        assert refvals.get(metric) == 2.0
+        assert not os.path.exists(corp.filepath)
+        refvals.save()
+        assert ReferenceValues(corp).get(metric) == 2.0
+        assert metric.calls == 1
+
+        print("  Testing batched storage...")
+        class _OtherMetric(_Metric):
+            def __init__(self):
+                super(_OtherMetric, self).__init__()
+                self.ID = "other"
+        other = _OtherMetric()
+        mtime = os.stat(corp.filepath).st_mtime_ns
+        assert ReferenceValues(corp).get_all([metric, metric]) == [2.0, 2.0]
+        assert os.stat(corp.filepath).st_mtime_ns == mtime
+        assert ReferenceValues(corp).get_all([metric, other]) == [2.0, 2.0]
+        assert ReferenceValues(corp).get(other) == 2.0
+        assert metric.calls == 1 and other.calls == 1
+
+        print("  Testing metric version change...")
+        metric.version = 2
+        assert ReferenceValues(corp).get_all([metric]) == [2.0]
+        assert metric.calls == 2
+
+        print("  Testing metric code change...")
+        class _ChangedMetric(_Metric):
+            def evaluate(self, node):
+                self.calls += 1
+                return node.data * 2.5
+        changed = _ChangedMetric()
+        changed.version = 2
+        assert metric.revision()[1] == _Metric().revision()[1] != changed.revision()[1]
+        assert ReferenceValues(corp).get_all([changed]) == [2.5]
+
+        print("  Testing corpus change...")
+        corp.data = 3
+        assert ReferenceValues(corp).get_all([metric]) == [6.0]
+        assert metric.calls == 3
+
+        print("  Testing build...")
+        assert ReferenceValues(corp).build([metric]) == {"test": 6.0}
+        assert metric.calls == 4
+        assert ReferenceValues.instance(corp) is ReferenceValues.instance(corp)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print("Passed all tests!")
@@ -15,6 +15,16 @@ class Report(Localizable):
         super(Report, self).__init__(ID, language, brief, description)
 
     def execute(self, docs, args):
+        """Executes the report.
+        Args:
+            docs: Iterable of Documents. May be a generator converting
+                  the Documents on demand, so it can be consumed only
+                  once and Documents should not be kept around after
+                  they have been evaluated.
+            args: Command line arguments (e.g. args.latex).
+        Return:
+            The report (unicode string).
+        """
         buf = list()
         return "\n".join(buf)
 
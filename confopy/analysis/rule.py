@@ -6,14 +6,22 @@ Description:
     Rule superclass and some predicates.
 '''
 
+from weakref import WeakKeyDictionary
+
 from .localizable import Localizable
+from confopy import instrument
 from confopy.model.document import *
 
 
 
 class Rule(Localizable):
     """Base class to describe rule based knowledge.
+    targets lists the Node classes the rule applies to. All other nodes
+    satisfy the rule without being evaluated.
     """
+
+    targets = (Node, )
+
     def __init__(self, ID="", language="", brief="", description=""):
         """Initializer.
         """
@@ -41,6 +49,28 @@ class Rule(Localizable):
 #        return self.__str__()
 
 
+class Violation(object):
+    """A Rule violated by a Node.
+    """
+    def __init__(self, node, rule_ID, message):
+        """Initializer.
+        Args:
+            node:    The Node violating the rule.
+            rule_ID: ID of the violated Rule.
+            message: Unicode error message of the Rule.
+        """
+        super(Violation, self).__init__()
+        self.node = node
+        self.rule_ID = rule_ID
+        self.message = message
+
+    def __str__(self):
+        return "Violation(%s, %s)" % (self.rule_ID, self.message)
+
+    def __repr__(self):
+        return self.__str__()
+
+
 # Predicates
 
 def is_chapter(node):
@@ -114,28 +144,77 @@ def _is_referenced(flt, before):
     """
     parent = flt.parent()
     if parent is not None:
-        siblings = list()
-        children = parent.children()
-        for child in children:
-            if before and child == flt:
-                break
-            if child.is_paragraph():
-                siblings.append(child)
-        para_texts = [sib.text for sib in siblings]
-        para_texts = "".join(para_texts)
+        index = ReferenceIndex.of(parent)
+        end = None
+        if before:
+            end = index.offset(flt)
 
         if flt.number != "":
-            return flt.number in para_texts
+            return index.mentions(flt.number, end)
         flt_text = flt.text.strip().split(" ")
         if len(flt_text) >= 2:
             flt_text = flt_text[0].strip() + " " + flt_text[1].strip()
             flt_text = flt_text.replace(":", "")
             # dirty hack, use regex for whitespace in future
             flt_text_newline = flt_text.replace(" ", "\n")
-            return (flt_text in para_texts) or (flt_text_newline in para_texts)
+            return index.mentions(flt_text, end) or index.mentions(flt_text_newline, end)
 
     return False
 
+class ReferenceIndex(object):
+    """Concatenated paragraph texts of the children of a node and the
+    offsets of the children within it, built once per node and shared by
+    all float reference checks.
+    Use ReferenceIndex.of(node) to obtain the shared index of a node.
+    """
+
+    _indices = WeakKeyDictionary()
+
+    @staticmethod
+    def of(node):
+        """Yields the shared ReferenceIndex of a node. The index is
+        rebuilt once the node or its children change.
+        """
+        index = ReferenceIndex._indices.get(node, None)
+        if index is None or index.revision != node.revision():
+            index = ReferenceIndex(node)
+            ReferenceIndex._indices[node] = index
+        return index
+
+    def __init__(self, node):
+        """Initializer.
+        Args:
+            node: Node whose paragraph children get indexed.
+        """
+        super(ReferenceIndex, self).__init__()
+        self.revision = node.revision()
+        self._offsets = dict()
+        texts = list()
+        length = 0
+        for child in node.children():
+            self._offsets[id(child)] = length
+            if child.is_paragraph():
+                texts.append(child.text)
+                length += len(child.text)
+        self.text = "".join(texts)
+
+    def offset(self, child):
+        """Length of the paragraph text preceding a child node.
+        """
+        return self._offsets.get(id(child), len(self.text))
+
+    def mentions(self, needle, end=None):
+        """Checks whether the indexed text contains a string.
+        Args:
+            needle: String to look for.
+            end:    Only consider the text before this offset.
+        Return:
+            Boolean.
+        """
+        if end is None:
+            end = len(self.text)
+        return self.text.find(needle, 0, end) >= 0
+
 FLT_CAPTION_MIN_SIZE = 3
 FLT_CAPTION_NR_SIZE = 2
 def has_caption(flt):
@@ -152,9 +231,53 @@ def has_caption(flt):
 
 # Utility functions
 
+def iter_violations(node, rules):
+    """Lazily evaluates a list of rules on a node and all its descendants
+    (depth-first, parents before children).
+    Rules are only evaluated on nodes of their target types. Evaluations
+    are measured as instrument spans "rule.<ID>".
+    Args:
+        node:  The Node (e.g. Document) to check.
+        rules: The rules to evaluate.
+    Return:
+        Generator yielding a Violation for each violated rule.
+    """
+    measured = instrument.is_enabled()
+    rules_by_type = dict()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        node_type = type(current)
+        targeting = rules_by_type.get(node_type, None)
+        if targeting is None:
+            targeting = [r for r in rules if issubclass(node_type, r.targets)]
+            rules_by_type[node_type] = targeting
+        for rule in targeting:
+            if measured:
+                with instrument.span("rule." + rule.ID):
+                    satisfied = rule.evaluate(current)
+            else:
+                satisfied = rule.evaluate(current)
+            if not satisfied:
+                yield Violation(current, rule.ID, rule.message(current))
+        stack.extend(reversed(current.children()))
+
+def count_violations(node, rules):
+    """Counts the rule violations of a node and all its descendants.
+    Args:
+        node:  The Node (e.g. Document) to check.
+        rules: The rules to evaluate.
+    Return:
+        Integer, number of violations.
+    """
+    count = 0
+    for _ in iter_violations(node, rules):
+        count += 1
+    return count
+
 def eval_doc(document, rules):
     """Evaluates a list of rules on a given document.
-    Recursive: can be used for other nodes than Document nodes as well.
+    Can be used for other nodes than Document nodes as well.
     Args:
         document: The Document to check.
         rules:    The rules to evaluate on document.
@@ -162,16 +285,7 @@ def eval_doc(document, rules):
         A list of unicode strings representing the messages
         of violated rules.
     """
-    messages = list()
-    for rule in rules:
-        if not rule.evaluate(document):
-            messages.append(rule.message(document))
-
-    children = document.children()
-    for child in children:
-        messages = messages + eval_doc(child, rules)
-
-    return messages
+    return [v.message for v in iter_violations(document, rules)]
 
 
 
@@ -217,6 +331,21 @@ Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id
     assert not was_referenced_before(floatB)
     assert was_referenced_before(floatC)
 
+    print("  Testing ReferenceIndex...")
+    index = ReferenceIndex.of(sec11)
+    assert ReferenceIndex.of(sec11) is index
+    assert index.mentions("Tabelle 1")
+    assert not index.mentions("Tabelle 1", index.offset(floatA))
+    assert index.mentions("ipsum", index.offset(floatA))
+    sec11.add_child(Paragraph(text="Siehe Tabelle\n2."))
+    assert ReferenceIndex.of(sec11) is not index
+    sec11.remove_child(sec11.children()[-1])
+    assert is_referenced(floatB) is False
+    sec12.add_child(Paragraph(text="Siehe Tabelle\n2."))
+    assert is_referenced(floatB)
+    assert not was_referenced_before(floatB)
+    sec12.remove_child(sec12.children()[-1])
+
     print("  Testing count_subsections...")
     assert count_subsections(doc) == 2
     assert count_subsections(sec1) == 2
@@ -224,6 +353,19 @@ Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id
     assert count_subsections(sec2) == 0
     assert count_subsections(floatA) == 0
 
+    print("  Testing rule targets...")
+    class _CountingRule(Rule):
+        targets = (Float, )
+        def __init__(self):
+            super(_CountingRule, self).__init__("counting", "de")
+            self.nodes = list()
+        def evaluate(self, node):
+            self.nodes.append(node)
+            return True
+    counting = _CountingRule()
+    assert count_violations(doc, [counting]) == 0
+    assert counting.nodes == [floatC, floatA, floatB]
+
     print("  Testing has_introduction...")
     assert has_introduction(doc)
     assert not has_introduction(sec1)
@@ -237,6 +379,7 @@ Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id
 
     print("  Testing eval_doc...")
     class IntroductionRule(Rule):
+        targets = (Section, )
         def __init__(self,
                      ID="introduction",
                      language="de",
@@ -247,6 +390,11 @@ Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id
             return not is_chapter(node) or has_introduction(node)
         def message(self, node):
             return "Kapitel \"%s\" hat keine Einleitung!" % node.title
+    class SubsectionRule(Rule):
+        def __init__(self):
+            super(SubsectionRule, self).__init__("subsections", "de")
+        def evaluate(self, node):
+            return not (is_section(node) and count_subsections(node) > 0) or (count_subsections(node) >= 2)
     rules = []
     rules.append(IntroductionRule())
     msgs = eval_doc(doc, rules)
@@ -254,4 +402,18 @@ Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id
                      'Kapitel "2. Raboof" hat keine Einleitung!']
     assert msgs == msgs_expected
 
+    print("  Testing iter_violations...")
+    violations = list(iter_violations(doc, rules + [SubsectionRule()]))
+    assert [v.rule_ID for v in violations] == ["introduction", "introduction"]
+    assert [v.node for v in violations] == [sec1, sec2]
+    assert count_violations(doc, rules) == 2
+    assert count_violations(sec11, rules) == 0
+
+    print("  Testing rule spans...")
+    instrument.enable()
+    count_violations(doc, rules)
+    instrument.disable()
+    assert instrument.spans()["rule.introduction"][0] == 5
+    instrument.reset()
+
     print("Passed all tests!")
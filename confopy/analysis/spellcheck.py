@@ -6,8 +6,14 @@ Description:
     Wrapper for PyEnchant.
 '''
 
+import os
+import os.path as op
+from pickle import dump, load, PicklingError
+from tempfile import mkstemp
+
 import enchant as e
 import confopy.config as C
+from confopy.analysis.lrucache import LRUCache
 
 ENCHANT_LANG_MAP = {
       "de": "de_DE"
@@ -26,15 +32,80 @@ def list_languages():
 
 class SpellChecker(object):
     """Wrapper for PyEnchant.
+    Caches the result of #check for the most recently checked words.
+    Use SpellChecker.instance(lang) to share one checker (and its cache)
+    per language.
     """
-    def __init__(self, lang=C.DEFAULT_LANG):
+
+    _instances = dict()
+    # Directory the caches of shared checkers are stored in, None: the
+    # caches are not stored (default). See #enable_persistence
+    _cache_dir = None
+
+    @staticmethod
+    def instance(lang=C.DEFAULT_LANG):
+        """Yields the shared SpellChecker of a given language.
+        Args:
+            lang: Language code, e.g. u"de" or u"en".
+        Return:
+            SpellChecker instance.
+        """
+        checker = SpellChecker._instances.get(lang, None)
+        if checker is None:
+            checker = SpellChecker(lang)
+            if SpellChecker._cache_dir is not None:
+                checker.load(SpellChecker.cache_file(lang))
+            SpellChecker._instances[lang] = checker
+        return checker
+
+    @staticmethod
+    def enable_persistence(directory=C.CACHE_DIR):
+        """Keeps the caches of the shared checkers between runs. They are
+        loaded from directory/spellcheck_<lang>.pkl and stored there by
+        #save_all.
+        Args:
+            directory: Directory of the cache files.
+        """
+        SpellChecker._cache_dir = directory
+        for (lang, checker) in SpellChecker._instances.items():
+            checker.load(SpellChecker.cache_file(lang))
+
+    @staticmethod
+    def cache_file(lang):
+        """Path of the stored cache of the shared checker of a language.
+        None if persistence is not enabled.
+        """
+        if SpellChecker._cache_dir is None:
+            return None
+        return op.join(SpellChecker._cache_dir, "spellcheck_%s.pkl" % lang)
+
+    @staticmethod
+    def save_all():
+        """Stores the caches of all shared checkers if persistence is
+        enabled (see #enable_persistence).
+        """
+        if SpellChecker._cache_dir is None:
+            return
+        for (lang, checker) in SpellChecker._instances.items():
+            checker.save(SpellChecker.cache_file(lang))
+
+    @staticmethod
+    def clear_all():
+        """Empties the caches of all shared checkers.
+        """
+        for checker in SpellChecker._instances.values():
+            checker._cache.clear()
+
+    def __init__(self, lang=C.DEFAULT_LANG, cache_size=C.SPELLCHECK_CACHE_SIZE):
         """Initializes a spellchecker with a given language.
         Args:
-            lang: Language code, e.g. u"de" or u"en", for the spellchecker.
+            lang:       Language code, e.g. u"de" or u"en", for the spellchecker.
+            cache_size: Maximum number of words to cache check results for.
         """
         super(SpellChecker, self).__init__()
         pyenchant_lang = ENCHANT_LANG_MAP.get(lang, "de_DE")
         self._enchant_dict = e.Dict(pyenchant_lang)
+        self._cache = LRUCache(cache_size)
 
     def check(self, word):
         """Checks a given word.
@@ -43,11 +114,54 @@ class SpellChecker(object):
         Return:
             Boolean. True if word is spelled correctly.
         """
-        return self._enchant_dict.check(word)
+        return self._cache.memo(word, self._enchant_dict.check)
 
     def suggest(self, word):
         return self._enchant_dict.suggest(word)
 
+    def dictionary(self):
+        """Identifies the enchant dictionary checking the words.
+        Return:
+            Tuple of the language tag and the name of the provider,
+            e.g. ("de_DE", "hunspell").
+        """
+        provider = getattr(self._enchant_dict, "provider", None)
+        return (getattr(self._enchant_dict, "tag", None),
+                getattr(provider, "name", None))
+
+    def load(self, filepath):
+        """Adds the check results stored in a file to the cache.
+        Missing or unreadable files and results of another dictionary
+        (see #dictionary) are ignored.
+        """
+        try:
+            with open(filepath, "rb") as f:
+                stored = load(f)
+            if stored["dictionary"] == self.dictionary():
+                self._cache.update(stored["items"])
+        except Exception:
+            pass
+
+    def save(self, filepath):
+        """Stores the cached check results in a file together with the
+        dictionary they stem from.
+        """
+        try:
+            directory = op.dirname(filepath)
+            if not op.isdir(directory):
+                os.makedirs(directory)
+            (fd, tmp_path) = mkstemp(dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    dump({"dictionary": self.dictionary(),
+                          "items": self._cache.items()}, f, -1)
+                os.rename(tmp_path, filepath)
+            except:
+                os.remove(tmp_path)
+                raise
+        except (IOError, OSError, PicklingError):
+            pass
+
 
 if __name__ == '__main__':
     print("Test for %s" % __file__)
@@ -60,6 +174,47 @@ if __name__ == '__main__':
     assert not checker.check(word_en)
     assert len(checker.suggest(word_en)) == 6
 
+    print("  Testing check cache...")
+    assert SpellChecker.instance("de") is SpellChecker.instance("de")
+    checker = SpellChecker("de", cache_size=2)
+    assert checker.check(word_de)
+    assert not checker.check(word_en)
+    assert len(checker._cache) == 2
+    SpellChecker.instance("de").check(word_de)
+    SpellChecker.clear_all()
+    assert len(SpellChecker.instance("de")._cache) == 0
+
+    print("  Testing cache persistence...")
+    import shutil
+    import tempfile
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        SpellChecker._instances.clear()
+        SpellChecker.instance("de").check(word_de)
+        SpellChecker.save_all()
+        assert os.listdir(tmp_dir) == []
+        SpellChecker.enable_persistence(tmp_dir)
+        SpellChecker.save_all()
+        assert os.listdir(tmp_dir) == ["spellcheck_de.pkl"]
+        SpellChecker._instances.clear()
+        assert ("Hallo", True) in list(SpellChecker.instance("de")._cache.items())
+
+        print("  Testing cache of another dictionary...")
+        cache_file = SpellChecker.cache_file("de")
+        with open(cache_file, "wb") as f:
+            dump({"dictionary": ("de_AT", None), "items": [("Hallo", False)]}, f)
+        checker = SpellChecker("de")
+        checker.load(cache_file)
+        assert len(checker._cache) == 0
+
+        print("  Testing failed save...")
+        checker._cache.put("Hallo", lambda: True)
+        checker.save(cache_file)
+        assert os.listdir(tmp_dir) == ["spellcheck_de.pkl"]
+    finally:
+        SpellChecker._cache_dir = None
+        shutil.rmtree(tmp_dir)
+
     print("  Testing list_languages...")
     assert list_languages() == ["de", "en"]
 
@@ -73,6 +73,254 @@ def mean_stdev(values, ndigits=None):
 
 
 
+class RunningStats(object):
+    """Count, mean, variance, minimum and maximum of a stream of values
+    in constant memory (Welford's algorithm). Instances filled by
+    different workers can be merged.
+    Matches mean, variance and stdev above (population variance).
+    """
+
+    def __init__(self, values=None):
+        """Initializer.
+        Args:
+            values: Optional iterable of initial values.
+        """
+        super(RunningStats, self).__init__()
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        if values is not None:
+            self.update(values)
+
+    def add(self, value):
+        """Adds a single value.
+        """
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / float(self.count)
+        self._m2 += delta * (value - self._mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def update(self, values):
+        """Adds all values of an iterable.
+        """
+        for v in values:
+            self.add(v)
+
+    def merge(self, other):
+        """Adds the values accumulated by another RunningStats.
+        Return:
+            self
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count = other.count
+            self.min = other.min
+            self.max = other.max
+            self._mean = other._mean
+            self._m2 = other._m2
+            return self
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / float(count)
+        self._m2 += other._m2 + delta * delta * self.count * other.count / float(count)
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def mean(self, ndigits=None):
+        """
+        Return:
+            Mean of the values, rounded to ndigits.
+        """
+        if self.count == 0:
+            raise ValueError("Can't compute mean over empty list!")
+        if ndigits is not None:
+            return round(self._mean, ndigits)
+        return self._mean
+
+    def variance(self, ndigits=None):
+        """
+        Return:
+            Variance of at least 2 values, rounded to ndigits.
+        """
+        if self.count < 2:
+            raise ValueError("Can't compute variance over less than 2 values.")
+        var = self._m2 / float(self.count)
+        if ndigits is not None:
+            return round(var, ndigits)
+        return var
+
+    def stdev(self, ndigits=None):
+        """
+        Return:
+            Standard deviation of at least 2 values, rounded to ndigits.
+        """
+        if self.count < 2:
+            raise ValueError("Can't compute standard deviation over less than 2 values.")
+        sd = math.sqrt(self._m2 / float(self.count))
+        if ndigits is not None:
+            return round(sd, ndigits)
+        return sd
+
+    def mean_stdev(self, ndigits=None):
+        """
+        Return:
+            (mean, standard deviation) tuple of at least 2 values, rounded
+            to ndigits.
+        """
+        if self.count < 2:
+            raise ValueError("Can't compute variance/standard deviation over less than 2 values.")
+        return (self.mean(ndigits), self.stdev(ndigits))
+
+
+
+class QuantileSketch(object):
+    """Approximate quantiles (e.g. median, percentiles) of a stream of
+    values. Keeps at most about compression weighted centroids, small
+    near the extremes and larger around the median (merging t-digest).
+    Exact as long as fewer than about compression / 2 values were added.
+    Sketches filled by different workers can be merged.
+    """
+
+    def __init__(self, compression=100, values=None):
+        """Initializer.
+        Args:
+            compression: Accuracy/size trade-off, the maximum number
+                         of centroids.
+            values:      Optional iterable of initial values.
+        """
+        super(QuantileSketch, self).__init__()
+        self.compression = compression
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._centroids = list() # sorted (mean, weight) tuples
+        self._buffer = list()
+        if values is not None:
+            self.update(values)
+
+    def add(self, value):
+        """Adds a single value.
+        """
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self._buffer.append((value, 1))
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def update(self, values):
+        """Adds all values of an iterable.
+        """
+        for v in values:
+            self.add(v)
+
+    def merge(self, other):
+        """Adds the values summarized by another QuantileSketch.
+        Return:
+            self
+        """
+        if other.count == 0:
+            return self
+        self.count += other.count
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+        self._buffer.extend(other._centroids)
+        self._buffer.extend(other._buffer)
+        self._compress()
+        return self
+
+    def _compress(self):
+        items = sorted(self._centroids + self._buffer)
+        self._buffer = list()
+        if len(items) == 0:
+            self._centroids = items
+            return
+        total = float(sum([w for (_, w) in items]))
+        merged = list()
+        preceding = 0.0
+        (cur_mean, cur_weight) = items[0]
+        for (m, w) in items[1:]:
+            # A centroid may span one unit of the arcsine scale, i.e. a
+            # quantile range shrinking towards q = 0 and q = 1
+            k_low = self._scale(preceding / total)
+            k_high = self._scale((preceding + cur_weight + w) / total)
+            if k_high - k_low <= 1.0:
+                cur_mean += (m - cur_mean) * w / float(cur_weight + w)
+                cur_weight += w
+            else:
+                merged.append((cur_mean, cur_weight))
+                preceding += cur_weight
+                (cur_mean, cur_weight) = (m, w)
+        merged.append((cur_mean, cur_weight))
+        self._centroids = merged
+
+    def _scale(self, q):
+        return self.compression / (2.0 * math.pi) * math.asin(2.0 * min(q, 1.0) - 1.0)
+
+    def quantile(self, q, ndigits=None):
+        """
+        Args:
+            q: Quantile between 0.0 and 1.0, e.g. 0.5 for the median.
+        Return:
+            Approximate q-quantile of the values, rounded to ndigits.
+            Interpolates between neighbouring values like the median of
+            an even number of values.
+        """
+        if self.count == 0:
+            raise ValueError("Can't compute quantile over empty list!")
+        if q < 0.0 or q > 1.0:
+            raise ValueError("Quantile must be between 0 and 1.")
+        if self._buffer:
+            self._compress()
+        centroids = self._centroids
+        target = q * self.count
+        # Centroid i covers the values around its center (cumulative weight)
+        centers = list()
+        cumulative = 0.0
+        for (_, w) in centroids:
+            centers.append(cumulative + w / 2.0)
+            cumulative += w
+        if target <= centers[0]:
+            (low, high, frac) = (self.min, centroids[0][0], target / centers[0])
+        elif target >= centers[-1]:
+            rest = self.count - centers[-1]
+            frac = 1.0
+            if rest > 0.0:
+                frac = (target - centers[-1]) / rest
+            (low, high) = (centroids[-1][0], self.max)
+        else:
+            i = 0
+            while centers[i + 1] < target:
+                i += 1
+            frac = (target - centers[i]) / (centers[i + 1] - centers[i])
+            (low, high) = (centroids[i][0], centroids[i + 1][0])
+        value = low + (high - low) * frac
+        if ndigits is not None:
+            return round(value, ndigits)
+        return value
+
+    def median(self, ndigits=None):
+        """
+        Return:
+            Approximate median of the values, rounded to ndigits.
+        """
+        return self.quantile(0.5, ndigits)
+
+
+
 if __name__ == '__main__':
     print("Test for %s" % __file__)
     values = list(range(10))
@@ -108,6 +356,43 @@ if __name__ == '__main__':
     stats_rounded = mean_stdev(values, 2)
     assert stats_rounded == (4.5, 2.87)
 
+    print("  Testing RunningStats...")
+    rs = RunningStats(values)
+    assert rs.count == 10 and rs.min == 0 and rs.max == 9
+    assert abs(rs.mean() - m) < 1e-12
+    assert abs(rs.variance() - var) < 1e-12
+    assert rs.mean_stdev(2) == stats_rounded
+    assert_raises(RunningStats().mean, None, "Mean of empty RunningStats did not fail!")
+    assert_raises(RunningStats([42]).stdev, None, "Stdev of 1 value did not fail!")
+
+    print("  Testing RunningStats merge...")
+    rs = RunningStats(values[:3]).merge(RunningStats(values[3:])).merge(RunningStats())
+    assert rs.count == 10 and rs.min == 0 and rs.max == 9
+    assert abs(rs.mean() - m) < 1e-12
+    assert abs(rs.variance() - var) < 1e-12
+
+    print("  Testing QuantileSketch...")
+    qs = QuantileSketch(values=values)
+    assert qs.median() == 4.5
+    assert qs.quantile(0.0) == 0 and qs.quantile(1.0) == 9
+    assert QuantileSketch(values=[3, 1, 2]).median() == 2
+    assert_raises(QuantileSketch().median, None, "Median of empty sketch did not fail!")
+
+    print("  Testing QuantileSketch accuracy and merge...")
+    import random
+    rnd = random.Random(0)
+    data = [rnd.gauss(0.0, 1.0) for _ in range(20000)]
+    parts = [QuantileSketch(values=data[i:i + 5000]) for i in range(0, len(data), 5000)]
+    qs = parts[0]
+    for part in parts[1:]:
+        qs.merge(part)
+    data.sort()
+    assert qs.count == len(data)
+    assert len(qs._centroids) <= qs.compression
+    for q in [0.01, 0.1, 0.5, 0.9, 0.99]:
+        exact = data[int(q * len(data))]
+        assert abs(qs.quantile(q) - exact) < 0.05, (q, qs.quantile(q), exact)
+
     print("Passed all tests!")
 
 
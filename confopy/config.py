@@ -1,7 +1,28 @@
 # coding: utf-8
 
+import os.path as op
+
 DEFAULT_LANG = "de"
 CORPUS_FILES = {
     "de": "tiger_release_aug07.corrected.16012013_utf8_patched.xml",
     "en": "",
 }
+
+# Persistent caches (e.g. extracted documents)
+CACHE_DIR = op.join(op.expanduser("~"), ".cache", "confopy")
+# Maximum size of the document cache in bytes
+DOCUMENT_CACHE_SIZE = 256 * 1024 * 1024
+# Number of words the spellchecker caches check results for
+SPELLCHECK_CACHE_SIZE = 100000
+# Let the confopy command keep the spellchecker cache in CACHE_DIR
+# (spellcheck_<lang>.pkl) between runs. Library use never stores it
+# unless SpellChecker.enable_persistence() is called.
+SPELLCHECK_CACHE_PERSIST = True
+# Number of (previous tag, word) pairs the corpus taggers cache tags for
+TAGGER_CACHE_SIZE = 200000
+# Number of words the German morphology caches lemmata and tenses for
+MORPHOLOGY_CACHE_SIZE = 100000
+# Prefer lemmata and tenses annotated in the TIGER corpus over pattern.de
+MORPHOLOGY_TIGER_TABLE = False
+# XML files larger than this (bytes) are validated document by document
+VALIDATE_STREAMING_SIZE = 64 * 1024 * 1024
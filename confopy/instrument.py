@@ -0,0 +1,144 @@
+# coding: utf-8
+'''
+File: instrument.py
+Author: Oliver Zscheyge
+Description:
+    Lightweight instrumentation: named spans around pipeline stages
+    collecting call counts, run times and memory allocations.
+    Disabled by default, spans cost a single flag check then. Memory
+    tracing is opt-in as it slows down every span considerably.
+'''
+
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+_enabled = False
+_memory = False
+# Span name -> [calls, total seconds, allocated bytes]
+_spans = OrderedDict()
+
+
+def enable(memory=False):
+    """Starts collecting spans.
+    Args:
+        memory: Also trace memory allocations (slows down the program and
+                distorts the measured times).
+    """
+    global _enabled, _memory
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def disable():
+    """Stops collecting spans.
+    """
+    global _enabled, _memory
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Forgets all collected spans.
+    """
+    _spans.clear()
+
+@contextmanager
+def span(name):
+    """Context manager measuring the enclosed block as span name.
+    Nested spans are measured inclusively.
+    """
+    if not _enabled:
+        yield
+        return
+    mem_start = 0
+    if _memory:
+        mem_start = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        allocated = 0
+        if _memory:
+            allocated = tracemalloc.get_traced_memory()[0] - mem_start
+        entry = _spans.get(name, None)
+        if entry is None:
+            entry = [0, 0.0, 0]
+            _spans[name] = entry
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += allocated
+
+def spans():
+    """Returns the collected spans.
+    Return:
+        Dict mapping span names to (calls, seconds, allocated bytes) tuples
+        in order of first completion.
+    """
+    return OrderedDict((k, tuple(v)) for (k, v) in _spans.items())
+
+def summary():
+    """Returns the collected spans as a table (unicode string), slowest
+    spans first.
+    """
+    if len(_spans) == 0:
+        return "No spans recorded."
+    width = max([len(name) for name in _spans] + [4]) + 2
+    buf = list()
+    buf.append("%s | CALLS  | TOTAL (s) | MEAN (ms) | MEM (KB)" % "SPAN".ljust(width))
+    buf.append("%s-+--------+-----------+-----------+---------" % "".ljust(width, "-"))
+    for (name, (calls, total, allocated)) in sorted(_spans.items(), key=lambda item: -item[1][1]):
+        mem = "-"
+        if _memory:
+            mem = "%d" % (allocated / 1024)
+        buf.append("%s | %6d | %9.3f | %9.2f | %8s" % (name.ljust(width), calls, total, 1000.0 * total / calls, mem))
+    return "\n".join(buf)
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+
+    def work(n):
+        with span("work"):
+            return sum([i * i for i in range(n)])
+
+    print("  Testing disabled spans...")
+    with span("disabled"):
+        work(10)
+    assert len(spans()) == 0
+
+    print("  Testing spans...")
+    enable()
+    assert not tracemalloc.is_tracing()
+    with span("outer"):
+        work(1000)
+        work(1000)
+    disable()
+    work(10)
+    recorded = spans()
+    assert list(recorded.keys()) == ["work", "outer"]
+    assert recorded["work"][0] == 2
+    assert recorded["outer"][1] >= recorded["work"][1]
+    assert summary().split("\n")[2].startswith("outer")
+
+    print("  Testing memory tracing...")
+    enable(memory=True)
+    with span("alloc"):
+        data = [str(i) for i in range(1000)]
+    assert spans()["alloc"][2] > 0
+    disable()
+    assert not tracemalloc.is_tracing()
+
+    reset()
+    assert summary() == "No spans recorded."
+
+    print("Passed all tests!")
@@ -1,6 +1,11 @@
 # coding: utf-8
 
+import confopy.config as C
 from confopy.analysis import Analyzer
 from confopy.localization.de.corpus_de import TigerCorpusReader
+from confopy.localization.de.morphology import MORPHOLOGY
 
-Analyzer.register(TigerCorpusReader(cache=False))
+TIGER = TigerCorpusReader(cache=False, lazy=True)
+Analyzer.register(TIGER)
+if C.MORPHOLOGY_TIGER_TABLE:
+    MORPHOLOGY.set_table(TIGER.morphology_table())
@@ -11,6 +11,7 @@ Description:
         http://nltk.org/book/ch02.html
 '''
 
+import os
 import os.path as op
 from pickle import dump, load
 from lxml import etree
@@ -21,7 +22,9 @@ from nltk.corpus import BracketParseCorpusReader
 from nltk.grammar import CFG, Nonterminal, induce_pcfg
 from nltk.tokenize.punkt import PunktTrainer, PunktSentenceTokenizer
 
+from confopy import instrument
 from confopy.analysis.corpus import Corpus
+from confopy.analysis.lrucache import LRUCache
 import confopy.config as C
 from .fillers_de import FILLERS_DE
 
@@ -152,6 +155,8 @@ class TigerCorpusReader(Corpus):
     STORAGE_ROOT = op.dirname(op.realpath(__file__))
     CORPUS_FILE = "_tiger_corpus.pkl"
     TAGGER_FILE = "_tiger_tagger.pkl"
+    REFERENCE_FILE = "_tiger_refvalues.pkl"
+    MORPHOLOGY_FILE = "_tiger_morphology.pkl"
 
     SENTS_FILE_SUFFIX = "_sents.pkl"
     PCFG_FILE_SUFFIX  = "_pcfg.pkl"
@@ -162,33 +167,58 @@ class TigerCorpusReader(Corpus):
     FEATURE_SEP = "-"
     NO_VALUE = "_"
 
-    def __init__(self, tigerfile=None, cache=False):
+    def __init__(self, tigerfile=None, cache=False, lazy=True):
+        """Initializer.
+        Args:
+            tigerfile: Path to the TIGER XML file.
+            cache:     Dump the parsed sentences next to the XML file and
+                       load them from there in subsequent runs.
+            lazy:      Parse the XML only when the sentences are needed.
+                       The tagger and sentence tokenizer get loaded from
+                       their cache files without touching the XML.
+        """
         super(TigerCorpusReader, self).__init__(ID="TIGER", language="de", brief="TIGER Treebank v2.2", description="TIGER deutscher Corpus")
         self._tagger = None
         self._pcfg = None
         self._pcfg_parser = None
         self._sent_tokenizer = None
+        self._tag_cache = LRUCache(C.TAGGER_CACHE_SIZE)
         self._tigerfile = tigerfile
         if self._tigerfile is None:
             #self._tigerfile = TigerCorpusReader.STORAGE_ROOT + u"/tiger_corpus/tiger_release_aug07.corrected.16012013_utf8_patched_half.xml"
             self._tigerfile = TigerCorpusReader.STORAGE_ROOT + "/" + C.CORPUS_FILES.get("de", "")
-        self.tiger_sents = None
-        if cache:
+        self._cache_sents = cache
+        self._tiger_sents = None
+        if not lazy:
+            self._tiger_sents = self._load_sents()
+
+    @property
+    def tiger_sents(self):
+        """List of all _TigerSentence objects of the corpus.
+        Parses the TIGER XML at the first access.
+        """
+        if self._tiger_sents is None:
+            with instrument.span("corpus.sentences"):
+                self._tiger_sents = self._load_sents()
+        return self._tiger_sents
+
+    def _load_sents(self):
+        tiger_sents = None
+        if self._cache_sents:
             try:
                 with open(self._tigerfile + TigerCorpusReader.SENTS_FILE_SUFFIX, 'rb') as f:
-                    self.tiger_sents = load(f)
+                    tiger_sents = load(f)
             except IOError:
-                self.tiger_sents = None
-        if self.tiger_sents is None:
+                tiger_sents = None
+        if tiger_sents is None:
             try:
                 context = etree.iterparse(self._tigerfile, events=("end",), tag="s", encoding="utf-8")
-                self.tiger_sents = self._fast_iter(context, self._sent_func)
-                if cache:
+                tiger_sents = self._fast_iter(context, self._sent_func)
+                if self._cache_sents:
                     try:
                         with open(self._tigerfile + TigerCorpusReader.SENTS_FILE_SUFFIX, 'wb') as f:
-                            dump(self.tiger_sents, f, -1)
+                            dump(tiger_sents, f, -1)
                     except IOError:
-                        self.tiger_sents = []
                         print("Could not cache TIGER sentences to %s%s" % (self._tigerfile, TigerCorpusReader.SENTS_FILE_SUFFIX))
             except IOError:
                 print("Error: TIGER corpus file not found. Please follow README to download and place it properly.")
@@ -196,6 +226,7 @@ class TigerCorpusReader(Corpus):
                 print("        needs to be placed here: " + TigerCorpusReader.STORAGE_ROOT + ")")
                 import sys
                 sys.exit(1)
+        return tiger_sents
 
     def _fast_iter(self, context, func):
         buf = list()
@@ -263,9 +294,61 @@ class TigerCorpusReader(Corpus):
             bigram_tagger = nltk.BigramTagger(tagged_sents, backoff=unigram_tagger)
             return bigram_tagger
 
-        self._tagger = _cached(self._tagger, TigerCorpusReader.STORAGE_ROOT + "/" + TigerCorpusReader.TAGGER_FILE, constructor)
+        with instrument.span("corpus.tagger"):
+            self._tagger = _cached(self._tagger, TigerCorpusReader.STORAGE_ROOT + "/" + TigerCorpusReader.TAGGER_FILE, constructor)
         return self._tagger
 
+    def tag(self, words, include_edgelabels=True):
+        """Tags a list of words with the TIGER tagger.
+        The tagger is a bigram tagger backing off to a unigram tagger, so
+        the tag of a word only depends on the word and the tag of its
+        predecessor. Tags are cached by these two values and shared
+        between all calls.
+        Args:
+            words: List of words (unicode strings).
+        Return:
+            List of (word, tag) tuples.
+        """
+        tagger = self.tagger(include_edgelabels)
+        tags = list()
+        for i in range(len(words)):
+            key = (tuple(tags[-1:]), words[i])
+            if key in self._tag_cache:
+                tag = self._tag_cache.get(key)
+            else:
+                tag = tagger.tag_one(words, i, tags)
+                self._tag_cache.put(key, tag)
+            tags.append(tag)
+        return list(zip(words, tags))
+
+    def clear_cache(self):
+        """Empties the cache of tagged words (see #tag).
+        """
+        self._tag_cache.clear()
+
+    def morphology_table(self):
+        """Maps all verb forms of the corpus to their most frequently
+        annotated (lemma, tense) tuple. The table is dumped to
+        MORPHOLOGY_FILE in STORAGE_ROOT at the first call.
+        Return:
+            Dict mapping words to (lemma, tense) tuples, e.g.
+            {u"sprang": (u"springen", u"past")}.
+        """
+        def constructor():
+            counts = dict()
+            for s in self.tiger_sents:
+                for t in s.terminals:
+                    if t.pos.startswith("V"):
+                        lemma = t.lemma
+                        if lemma in ["--", "None", TigerCorpusReader.NO_VALUE]:
+                            lemma = ""
+                        entry = (lemma, t.tense)
+                        word_counts = counts.setdefault(t.word, dict())
+                        word_counts[entry] = word_counts.get(entry, 0) + 1
+            return {w: max(counts[w], key=counts[w].get) for w in counts}
+
+        return _cached(None, TigerCorpusReader.STORAGE_ROOT + "/" + TigerCorpusReader.MORPHOLOGY_FILE, constructor)
+
     def pcfg(self, include_edgelabels=True):
         sents = self.parsed_sents(include_edgelabels)
         tiger_prods = set(prod for sent in sents for prod in sent.productions())
@@ -304,12 +387,25 @@ class TigerCorpusReader(Corpus):
             params = trainer.get_params()
             return PunktSentenceTokenizer(params)
 
-        self._sent_tokenizer = _cached(self._sent_tokenizer, TigerCorpusReader.STORAGE_ROOT + "/" + TigerCorpusReader.SENT_TOKENIZER_FILE_SUFFIX, constructor)
+        with instrument.span("corpus.sent_tokenizer"):
+            self._sent_tokenizer = _cached(self._sent_tokenizer, TigerCorpusReader.STORAGE_ROOT + "/" + TigerCorpusReader.SENT_TOKENIZER_FILE_SUFFIX, constructor)
         return self._sent_tokenizer
 
     def fillers(self):
         return FILLERS_DE
 
+    def stamp(self):
+        """Size and modification time of the TIGER XML file.
+        """
+        try:
+            st = os.stat(self._tigerfile)
+            return (st.st_size, int(st.st_mtime))
+        except OSError:
+            return None
+
+    def reference_file(self):
+        return TigerCorpusReader.STORAGE_ROOT + "/" + TigerCorpusReader.REFERENCE_FILE
+
 
 
 CORPUS_PATH = TigerCorpusReader.STORAGE_ROOT + "/" + TigerCorpusReader.CORPUS_FILE
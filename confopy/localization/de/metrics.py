@@ -8,9 +8,18 @@ Description:
 
 from math import fsum
 
-from confopy.analysis import Metric, Analyzer, SpellChecker, NO_WORDS
-from pattern.de import lemma, tenses
-from functools import reduce
+from confopy.analysis import Metric, Analyzer, AnalysisContext, SpellChecker
+from confopy.localization.de.morphology import lemma, tenses
+
+
+def _context(node):
+    """Returns the AnalysisContext of a node shared by all German metrics.
+    Metrics read the word, sentence and tag statistics of the context,
+    which are each computed in a single pass over the node.
+    """
+    A = Analyzer.instance()
+    corp = A.get(corpus="TIGER")
+    return AnalysisContext.of(node, corp, lemma)
 
 # General German metrics
 
@@ -23,13 +32,11 @@ class WordLengthMetric(Metric):
                                                "Durchschnittliche Wortlänge")
 
     def evaluate(self, node):
-        A = Analyzer.instance()
-        #corp = A.get(corpus=u"TIGER")
-        words = node.words()
-        word_count = len(words)
-        word_len = reduce(lambda w, v: w + v, [len(w) for w in words], 0)
-        if len(words) > 0:
-            return word_len / float(len(words))
+        word_counts = _context(node).word_counts()
+        word_count = sum(word_counts.values())
+        word_len = sum([len(w) * n for (w, n) in word_counts.items()])
+        if word_count > 0:
+            return word_len / float(word_count)
         return 0.0
 Analyzer.register(WordLengthMetric())
 
@@ -47,14 +54,15 @@ Anzahl an Rechtschreibfehlern relativ zur Gesamtanzahl aller Wörter.""")
     def evaluate(self, node):
         """Value range: [0.0, 1.0]
         """
-        checker = SpellChecker(self.language)
-        words = [w for w in node.words() if w not in NO_WORDS]
+        checker = SpellChecker.instance(self.language)
+        word_counts = _context(node).filtered_word_counts()
+        word_count = sum(word_counts.values())
         n_errors = 0
-        for w in words:
+        for (w, n) in word_counts.items():
             if not checker.check(w):
-                n_errors += 1
-        if len(words) > 0:
-            return n_errors / float(len(words))
+                n_errors += n
+        if word_count > 0:
+            return n_errors / float(word_count)
         return 0.0
 Analyzer.register(SpellCheckMetric())
 
@@ -72,22 +80,12 @@ class LexiconMetric(Metric):
 Anzahl einzigartiger Lemmata relativ zur Gesamtanzahl aller Wörter.""")
 
     def evaluate(self, node):
-        words = node.words()
-        words_no_no_words = [w for w in words if w not in NO_WORDS]
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        tagger = corp.tagger(True)
-        tagged_words = tagger.tag(words)
-        unique_words = set()
-        if len(tagged_words) > 0 and len(words_no_no_words) > 0:
-            for w in tagged_words:
-                if w[0] not in NO_WORDS:
-                    if w[1] and w[1].startswith("V"):
-                        lemm = lemma(w[0])
-                        unique_words.add(lemm)
-                    else:
-                        unique_words.add(w[0])
-            return float(len(unique_words)) / len(words_no_no_words)
+        ctx = _context(node)
+        word_count = sum(ctx.filtered_word_counts().values())
+        if word_count > 0:
+            # Verbs are reduced to their lemma
+            unique_words = ctx.lemma_set()
+            return float(len(unique_words)) / word_count
         return 0.0
 Analyzer.register(LexiconMetric())
 
@@ -101,15 +99,9 @@ class SentLengthMetric(Metric):
                                                "Durchschnittliche Satzlänge")
 
     def evaluate(self, node):
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        sents = node.sents(tokenizer=corp.sent_tokenizer())
-        summ = 0
-        for s in sents:
-            s = [w for w in s if w not in NO_WORDS]
-            summ += len(s)
-        if len(sents) > 0:
-            return float(summ) / len(sents)
+        sent_lengths = _context(node).sent_lengths()
+        if len(sent_lengths) > 0:
+            return float(sum(sent_lengths)) / len(sent_lengths)
         return 0.0
 Analyzer.register(SentLengthMetric())
 
@@ -127,13 +119,11 @@ class ARIMetric(Metric):
 Je größer der Wert, desto anspruchsvoller ist der Text.""")
 
     def evaluate(self, node):
-        words = [w for w in node.words() if w not in NO_WORDS]
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        sents = node.sents(tokenizer=corp.sent_tokenizer())
-        char_count = float(sum([len(w) for w in words]))
-        word_count = float(len(words))
-        sent_count = float(len(sents))
+        ctx = _context(node)
+        word_counts = ctx.filtered_word_counts()
+        char_count = float(sum([len(w) * n for (w, n) in word_counts.items()]))
+        word_count = float(sum(word_counts.values()))
+        sent_count = float(len(ctx.sent_lengths()))
         if word_count > 0.0 and sent_count > 0.0:
             return (word_count / sent_count) + 9 * (char_count / word_count)
         return 0.0
@@ -157,15 +147,10 @@ Vorkommen von 'ich', 'wir', 'sie' relativ zur Satzanzahl.
     Je kleiner der Wert, desto besser.""")
 
     def evaluate(self, node):
-        words = node.words()
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        sents_count = len(node.sents(tokenizer=corp.sent_tokenizer()))
-        count = 0
-        for w in words:
-            low = w.lower()
-            if low in PersonalStyleMetric.PERSONAL:
-                count += 1
+        ctx = _context(node)
+        lower_counts = ctx.lower_word_counts()
+        sents_count = len(ctx.sent_lengths())
+        count = sum([lower_counts[w] for w in set(PersonalStyleMetric.PERSONAL)])
         if sents_count > 0:
             return float(count) / sents_count
         return 0.0
@@ -184,15 +169,10 @@ Anzahl an 'man' relativ zur Satzanzahl.
         self.IMPERSONAL = ["man"]
 
     def evaluate(self, node):
-        words = node.words()
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        sents_count = len(node.sents(tokenizer=corp.sent_tokenizer()))
-        count = 0
-        for w in words:
-            low = w.lower()
-            if low in self.IMPERSONAL:
-                count += 1
+        ctx = _context(node)
+        lower_counts = ctx.lower_word_counts()
+        sents_count = len(ctx.sent_lengths())
+        count = sum([lower_counts[w] for w in set(self.IMPERSONAL)])
         if sents_count > 0:
             return float(count) / sents_count
         return 0.0
@@ -222,33 +202,28 @@ Anzahl an Verben im Präsenz relativ zur Gesamtanzahl aller Verben.
     Je höher der Wert, desto besser.""")
 
     def evaluate(self, node):
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        tagger = corp.tagger(True)
-        tagged_words = tagger.tag(node.words())
+        verb_counts = _context(node).verb_counts()
         pres_verbs = 0
         total_verbs = 0
-        for w in tagged_words:
-            if w[1] and w[1].startswith("V"):
-                #if w[1].startswith(u"VVFIN") or\
-                #   w[1].startswith(u"VAFIN") or\
-                #   w[1].startswith(u"VVINF") or\
-                #   w[1].startswith(u"VVIZU"): # beinhaltet noch vergangenheit!
-                #    pres_verbs += 1
-                total_verbs += 1
-                tense = tenses(w[0])
-                if tense is not []:
-                    tense = [t[0] for t in tense]
-                    past_count = 0
-                    present_count = 0
-                    for t in tense:
-                        if t == "past":
-                            past_count += 1
-                        elif t == "present":
-                            present_count += 1
-                    if present_count > past_count:
-                        pres_verbs += 1
-                #print w
+        for ((w, _), n) in verb_counts.items():
+            #if w[1].startswith(u"VVFIN") or\
+            #   w[1].startswith(u"VAFIN") or\
+            #   w[1].startswith(u"VVINF") or\
+            #   w[1].startswith(u"VVIZU"): # beinhaltet noch vergangenheit!
+            #    pres_verbs += 1
+            total_verbs += n
+            tense = tenses(w)
+            if tense is not []:
+                tense = [t[0] for t in tense]
+                past_count = 0
+                present_count = 0
+                for t in tense:
+                    if t == "past":
+                        past_count += 1
+                    elif t == "present":
+                        present_count += 1
+                if present_count > past_count:
+                    pres_verbs += n
         if total_verbs > 0:
             return float(pres_verbs) / total_verbs
         return 0.0
@@ -267,17 +242,9 @@ Anzahl verstärkender Adverbien relativ zur Gesamtanzahl aller Wörter.
     Je kleiner der Wert, desto besser.""")
 
     def evaluate(self, node):
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        tagger = corp.tagger(True)
-        words = node.words()
-        words_no_no_words = [w for w in words if w not in NO_WORDS]
-        tagged_words = tagger.tag(words)
-        word_count = len(words_no_no_words)
-        count = 0
-        for w in tagged_words:
-            if w[1] and "ADV-MO" == w[1]:
-                count += 1
+        ctx = _context(node)
+        word_count = sum(ctx.filtered_word_counts().values())
+        count = ctx.tag_counts()["ADV-MO"]
         if word_count > 0:
             return float(count) / word_count
         return 0.0
@@ -312,19 +279,13 @@ Relativ zur Satzanzahl. Tote Verben sind folgende:
         self.VERBS = ["gehören", "liegen", "beinhalten", "enthalten", "befinden", "geben", "bewirken", "bewerkstelligen", "vergegenwärtigen"]
 
     def evaluate(self, node):
-        words = node.words()
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        sents_count = len(node.sents(tokenizer=corp.sent_tokenizer()))
-        tagger = corp.tagger(True)
-        tagged_words = tagger.tag(words)
+        ctx = _context(node)
+        sents_count = len(ctx.sent_lengths())
         count = 0
-        if len(tagged_words) > 0:
-            for w in tagged_words:
-                if w[1] and w[1].startswith("V"):
-                    lemm = lemma(w[0])
-                    if lemm in self.VERBS:
-                        count += 1
+        if sum(ctx.word_counts().values()) > 0 and sents_count > 0:
+            for ((_, lemma), n) in ctx.verb_counts().items():
+                if lemma in self.VERBS:
+                    count += n
             return float(count) / sents_count
         return 0.0
 Analyzer.register(DeadVerbsMetric())
@@ -341,19 +302,15 @@ Anzahl an Füllwörtern relativ zur Gesamtanzahl aller Wörter.
     Je kleiner der Wert, desto besser.""")
 
     def evaluate(self, node):
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
+        ctx = _context(node)
         fillers = list()
-        if corp:
-            fillers = corp.fillers()
-        words = node.words()
-        words_no_no_words = [w for w in words if w not in NO_WORDS]
-        filler_count = 0
-        for w in words:
-            if w in fillers:
-                filler_count += 1
-        if len(words_no_no_words) > 0:
-            return float(filler_count) / len(words_no_no_words)
+        if ctx.corpus:
+            fillers = ctx.corpus.fillers()
+        word_counts = ctx.word_counts()
+        word_count = sum(ctx.filtered_word_counts().values())
+        filler_count = sum([word_counts[w] for w in set(fillers)])
+        if word_count > 0:
+            return float(filler_count) / word_count
         return 0.0
 
 Analyzer.register(FillerMetric())
@@ -371,12 +328,8 @@ class ExampleCountMetric(Metric):
 Je größer der Wert, desto besser.""")
 
     def evaluate(self, node):
-        words = node.words()
-        bsp_count = 0
-        for w in words:
-            lo = w.lower()
-            if lo in ExampleCountMetric.BSP_INDICATORS:
-                bsp_count += 1
+        lower_counts = _context(node).lower_word_counts()
+        bsp_count = sum([lower_counts[w] for w in set(ExampleCountMetric.BSP_INDICATORS)])
         return bsp_count
 
 Analyzer.register(ExampleCountMetric())
@@ -392,18 +345,12 @@ class SentenceLengthVariationMetric(Metric):
                                                             "Je größer der Wert, desto besser.")
 
     def evaluate(self, node):
-        A = Analyzer.instance()
-        corp = A.get(corpus="TIGER")
-        sents = node.sents(tokenizer=corp.sent_tokenizer())
+        sent_lengths = _context(node).sent_lengths()
         sent_len_diff = 0
-        last_sent = None
-        for s in sents:
-            s = [w for w in s if w not in NO_WORDS]
-            if last_sent is not None:
-                sent_len_diff += abs(len(last_sent) - len(s))
-            last_sent = s
-        if len(sents) > 1:
-            return sent_len_diff / float(len(sents) - 1)
+        for i in range(1, len(sent_lengths)):
+            sent_len_diff += abs(sent_lengths[i - 1] - sent_lengths[i])
+        if len(sent_lengths) > 1:
+            return sent_len_diff / float(len(sent_lengths) - 1)
         return 0.0
 
 Analyzer.register(SentenceLengthVariationMetric())
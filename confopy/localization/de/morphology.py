@@ -0,0 +1,111 @@
+# coding: utf-8
+'''
+File: morphology.py
+Author: Oliver Zscheyge
+Description:
+    Memoizing lemma and tense lookup for German words used by all
+    German metrics.
+'''
+
+from pattern.de import lemma as pattern_lemma, tenses as pattern_tenses
+
+import confopy.config as C
+from confopy.analysis.lrucache import LRUCache
+
+
+# TIGER tense attribute values mapped to pattern.de tense names
+TIGER_TENSES = {
+      "pres": "present"
+    , "past": "past"
+}
+
+
+class Morphology(object):
+    """Front end for pattern.de.lemma and pattern.de.tenses caching the
+    results of the most recently looked up words.
+    Optionally consults a table mapping word forms to (lemma, tense)
+    tuples first, e.g. derived from the TIGER corpus (see
+    TigerCorpusReader#morphology_table).
+    """
+
+    def __init__(self, table=None, cache_size=C.MORPHOLOGY_CACHE_SIZE):
+        """Initializer.
+        Args:
+            table:      Dict mapping words to (lemma, tense) tuples.
+                        Tense is a TIGER tense value, e.g. u"pres".
+            cache_size: Maximum number of words to cache results for.
+        """
+        super(Morphology, self).__init__()
+        self._lemmata = LRUCache(cache_size)
+        self._tenses = LRUCache(cache_size)
+        self.set_table(table)
+
+    def set_table(self, table):
+        """Replaces the lookup table and clears all cached results.
+        """
+        self._table = table or dict()
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Forgets all cached results.
+        """
+        self._lemmata.clear()
+        self._tenses.clear()
+
+    def lemma(self, word):
+        """Returns the lemma of a (verb) word.
+        """
+        return self._lemmata.memo(word, self._lookup_lemma)
+
+    def tenses(self, word):
+        """Returns the possible tenses of a verb as pattern.de tuples,
+        e.g. [(u"present", 3, u"singular", ...), ...].
+        The returned list must not be modified.
+        """
+        return self._tenses.memo(word, self._lookup_tenses)
+
+    def _lookup_lemma(self, word):
+        entry = self._table.get(word, None)
+        if entry is not None and entry[0]:
+            return entry[0]
+        return pattern_lemma(word)
+
+    def _lookup_tenses(self, word):
+        entry = self._table.get(word, None)
+        if entry is not None and entry[1] in TIGER_TENSES:
+            return [(TIGER_TENSES[entry[1]], )]
+        return pattern_tenses(word)
+
+
+MORPHOLOGY = Morphology()
+
+def lemma(word):
+    """Lemma of a word using the shared Morphology.
+    """
+    return MORPHOLOGY.lemma(word)
+
+def tenses(word):
+    """Tenses of a verb using the shared Morphology.
+    """
+    return MORPHOLOGY.tenses(word)
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+
+    print("  Testing cached lookup...")
+    morph = Morphology()
+    assert morph.lemma("springt") == pattern_lemma("springt")
+    assert morph.lemma("springt") is morph.lemma("springt")
+    assert morph.tenses("lachte") == pattern_tenses("lachte")
+    assert morph.tenses("lachte") is morph.tenses("lachte")
+
+    print("  Testing lookup table...")
+    morph.set_table({"sprang": ("springen", "past"), "ging": ("", "--")})
+    assert morph.lemma("sprang") == "springen"
+    assert morph.tenses("sprang") == [("past", )]
+    assert morph.lemma("ging") == pattern_lemma("ging")
+    assert morph.tenses("ging") == pattern_tenses("ging")
+
+    print("Passed all tests!")
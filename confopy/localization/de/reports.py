@@ -6,8 +6,8 @@ Description:
     Implementation of all reports
 '''
 
-from confopy.analysis import Report, Analyzer, mean_stdev
-from confopy.analysis.rule import eval_doc
+from confopy.analysis import Report, Analyzer, ReferenceValues, RunningStats, QuantileSketch
+from confopy.analysis.rule import iter_violations, count_violations
 from functools import reduce
 
 
@@ -26,8 +26,8 @@ class DocumentAverages(Report):
                                                "de",
                                                "Durchschnitt über mehrere Dokumente",
                                                """\
-Evaluiert die Metriken für mehrere Dokumente, berechnet den Durchschnitt
-    und die Standardabweichung.
+Evaluiert die Metriken für mehrere Dokumente, berechnet den Durchschnitt,
+    die Standardabweichung und den Median.
     Listet in der letzten Spalte die Metrikwerte des TIGER-Corpus (deutsche
     Sprachreferenz).
     Unterstützt die Option --latex.""")
@@ -38,33 +38,41 @@ Evaluiert die Metriken für mehrere Dokumente, berechnet den Durchschnitt
         A = Analyzer.instance()
         metrics = [A.get(metric=m) for m in metric_names]
         metrics = [m for m in metrics if m != None]
-        corp = A.get(corpus="TIGER")
-        results = list()
-        for m in metrics:
-            results.append([m.evaluate(d) for d in docs])
-        stats = [mean_stdev(r, ROUND) for r in results]
+        refvals = ReferenceValues.instance(A.get(corpus="TIGER"))
+        # Constant memory in the number of documents
+        results = [RunningStats() for m in metrics]
+        medians = [QuantileSketch() for m in metrics]
+        for d in docs:
+            for i in range(len(metrics)):
+                val = metrics[i].evaluate(d)
+                results[i].add(val)
+                medians[i].add(val)
+        stats = [r.mean_stdev(ROUND) for r in results]
+        medians = [m.median(ROUND) for m in medians]
         if args.latex:
-            output.append("\\begin{tabular}{l|l l|r}")
-            output.append("    Metric & mean & stdev & TIGER \\\\")
+            output.append("\\begin{tabular}{l|l l l|r}")
+            output.append("    Metric & mean & stdev & median & TIGER \\\\")
             output.append("    \\hline")
         else:
             output.append("# Bericht \"%s\"" % self.ID)
             output.append("")
             output.append(" * MEAN:  der Mittelwert über alle Dokumente")
-            output.append(" * STDEV: die dazugehörige Standardabweichung")
-            output.append(" * TIGER: Metrikwert für die deutsche Sprachereferenz,")
-            output.append("          den TIGER-Corpus")
+            output.append(" * STDEV:  die dazugehörige Standardabweichung")
+            output.append(" * MEDIAN: der Median über alle Dokumente (bei vielen")
+            output.append("           Dokumenten genähert)")
+            output.append(" * TIGER:  Metrikwert für die deutsche Sprachereferenz,")
+            output.append("           den TIGER-Corpus")
             output.append("")
-            output.append("%s | MEAN  | STDEV | TIGER" % "METRIC".ljust(METRIC_COL_WIDTH))
-            output.append("%s-+-------+-------+------" % "".ljust(METRIC_COL_WIDTH, "-"))
+            output.append("%s | MEAN  | STDEV | MEDIAN | TIGER" % "METRIC".ljust(METRIC_COL_WIDTH))
+            output.append("%s-+-------+-------+--------+------" % "".ljust(METRIC_COL_WIDTH, "-"))
+        # Precomputed metric values of the reference corpus
+        ref_values = refvals.get_all(metrics)
         for i in range(len(metrics)):
-            # Execute metrics on reference corpus
-            val = metrics[i].evaluate(corp)
-            val = round(val, ROUND)
+            val = round(ref_values[i], ROUND)
             if args.latex:
-                output.append("    %s & %s & %s & %s \\\\" % (metric_names[i].ljust(METRIC_COL_WIDTH), stats[i][0], stats[i][1], val))
+                output.append("    %s & %s & %s & %s & %s \\\\" % (metric_names[i].ljust(METRIC_COL_WIDTH), stats[i][0], stats[i][1], medians[i], val))
             else:
-                output.append("%s | %05.2f | %05.2f | %05.2f" % (metric_names[i].ljust(METRIC_COL_WIDTH), stats[i][0], stats[i][1], val))
+                output.append("%s | %05.2f | %05.2f | %05.2f  | %05.2f" % (metric_names[i].ljust(METRIC_COL_WIDTH), stats[i][0], stats[i][1], medians[i], val))
         if args.latex:
             output.append("\\end{tabular}")
         return "\n".join(output)
@@ -94,14 +102,16 @@ Benötigt eine gerade Anzahl n an Dokumenten (mind. 2).
 
     def execute(self, docs, args):
         output = list()
-        if len(docs) < 2 or len(docs) % 2 != 0:
+        metric_names = METRIC_NAMES
+        A = Analyzer.instance()
+        metrics = [A.get(metric=m) for m in metric_names]
+        metrics = [m for m in metrics if m != None]
+        # Metric values per document, the Documents themselves are not kept
+        doc_vals = [[m.evaluate(doc) for m in metrics] for doc in docs]
+        if len(doc_vals) < 2 or len(doc_vals) % 2 != 0:
             output.append("Error: Need an even number of documents (at least 2) for the document comparison report!")
         else:
-            metric_names = METRIC_NAMES
-            A = Analyzer.instance()
-            metrics = [A.get(metric=m) for m in metric_names]
-            metrics = [m for m in metrics if m != None]
-            if len(docs) == 2:
+            if len(doc_vals) == 2:
                 output.append("# Bericht \"%s\""% self.ID)
                 output.append("")
                 output.append(" * PROGRESS: Vorher- --> Nachher-Wert.")
@@ -111,8 +121,9 @@ Benötigt eine gerade Anzahl n an Dokumenten (mind. 2).
                 output.append("")
                 output.append("%s | PROGRESS" % "METRIC".ljust(METRIC_COL_WIDTH))
                 output.append("%s-+---------------------" % "".ljust(METRIC_COL_WIDTH, "-"))
-                for m in metrics:
-                    vals = [m.evaluate(doc) for doc in docs]
+                for i in range(len(metrics)):
+                    m = metrics[i]
+                    vals = [doc_vals[0][i], doc_vals[1][i]]
                     progress = "="
                     if vals[0] > vals[1]:
                         progress = "-"
@@ -121,7 +132,7 @@ Benötigt eine gerade Anzahl n an Dokumenten (mind. 2).
                     output.append("%s | %05.2f --> %05.2f  (%s)" % (m.ID.ljust(METRIC_COL_WIDTH), vals[0], vals[1], progress))
 
             else:
-                half = len(docs) / 2
+                half = len(doc_vals) // 2
                 if args.latex:
                     output.append("\\begin{tabular}{l|l l|l l|r}")
                     output.append("\\multirow{2}{*}{\\textbf{Metrik}} & \\multicolumn{2}{|c|}{\\textbf{Erhöhung}} & \\multicolumn{2}{|c|}{\\textbf{Verringerung}} & \\textbf{gleichbleibend} \\\\")
@@ -139,10 +150,11 @@ Benötigt eine gerade Anzahl n an Dokumenten (mind. 2).
                     output.append("")
                     output.append("%s | +  | DELTA+ | -  | DELTA- | =  " % "METRIC".ljust(METRIC_COL_WIDTH))
                     output.append("%s-+----+--------+----+--------+----" % "".ljust(METRIC_COL_WIDTH, "-"))
-                for m in metrics:
+                for j in range(len(metrics)):
+                    m = metrics[j]
                     results = list()
                     for i in range(half):
-                        results.append((m.evaluate(docs[i]), m.evaluate(docs[i + half])))
+                        results.append((doc_vals[i][j], doc_vals[i + half][j]))
                     counts = [0, 0, 0] # greater, less, equal
                     avg_diffs = [0.0, 0.0]
                     for r in results:
@@ -208,18 +220,24 @@ Berechnet die Metrikwerte für mehrere Dokumente.
         A = Analyzer.instance()
         metrics = [A.get(metric=m) for m in metric_names]
         metrics = [m for m in metrics if m != None]
-        corp = A.get(corpus="TIGER")
-        results = list()
-        for m in metrics:
-            results.append([m.evaluate(d) for d in docs])
+        rule_IDs = RULE_NAMES
+        rules = [A.get(rule=ID) for ID in rule_IDs if A.get(rule=ID) is not None]
+        # Only the metric values and rule violation counts are kept, not
+        # the Documents
+        results = [list() for m in metrics]
+        violated_rule_counts = list()
+        for d in docs:
+            for i in range(len(metrics)):
+                results[i].append(metrics[i].evaluate(d))
+            violated_rule_counts.append(count_violations(d, rules))
 
         exceedances = self.compute_exceedances(metric_names, results)
         exceedances_transposed = list(map(list, list(zip(*exceedances))))
 
         # Metric matrix output
-        doc_numbers = list(range(1, len(docs) + 1))
+        doc_numbers = list(range(1, len(violated_rule_counts) + 1))
         if args.latex:
-            tabular_format_str = [" r" for d in docs]
+            tabular_format_str = [" r" for d in doc_numbers]
             tabular_format_str = "".join(tabular_format_str)
             output.append("\\begin{tabular}{l|%s}" % tabular_format_str)
             docs_header_str = list(map("& doc%02d ".__mod__, doc_numbers))
@@ -265,10 +283,6 @@ Berechnet die Metrikwerte für mehrere Dokumente.
             output.append("%s%s" % ("Transgressions".ljust(METRIC_COL_WIDTH), exceedances_str))
 
         # Rule violations
-        rule_IDs = RULE_NAMES
-        rules = [A.get(rule=ID) for ID in rule_IDs if A.get(rule=ID) is not None]
-        violated_rule_counts = [len(eval_doc(doc, rules)) for doc in docs]
-
         if args.latex:
             violated_rule_counts_str = list(map("& %d ".__mod__, violated_rule_counts))
             violated_rule_counts_str = "".join(violated_rule_counts_str)
@@ -334,9 +348,10 @@ Berechnet die Metriken für ein Dokument und überprüft die Regeln.
         super(DocumentReport, self).__init__(ID, lang, brief, description)
 
     def execute(self, docs, args):
-        if len(docs) < 1:
-            return ""
         output = []
+        rule_IDs = RULE_NAMES
+        A = Analyzer.instance()
+        rules = [A.get(rule=ID) for ID in rule_IDs if A.get(rule=ID) is not None]
         for doc in docs:
             output.append("# Dokumentbericht")
             output.append("")
@@ -347,15 +362,12 @@ Berechnet die Metriken für ein Dokument und überprüft die Regeln.
             output.append("")
             output.append("## Regeln")
             output.append("")
-            rule_IDs = RULE_NAMES
-            A = Analyzer.instance()
-            rules = [A.get(rule=ID) for ID in rule_IDs if A.get(rule=ID) is not None]
-            rule_messages = eval_doc(doc, rules)
-            if len(rule_messages) == 0:
+            violated = False
+            for v in iter_violations(doc, rules):
+                output.append(v.message)
+                violated = True
+            if not violated:
                 output.append("Es liegen keine Regelverletzungen vor!")
-            else:
-                for m in rule_messages:
-                    output.append(m)
         return "\n".join(output)
 
     def _execute_metric(self, metric_ID, node):
@@ -395,10 +407,12 @@ class SectionsReport(DocumentReport):
 Berechnet die Metriken für jedes Kapitel einzeln.""")
 
     def execute(self, docs, args):
+        doc = next(iter(docs), None)
+        if doc is None:
+            return ""
         output = list()
         output.append("# Abschnittsweiser Bericht")
         output.append("")
-        doc = docs[0]
         sections = doc.sections()
         for sec in sections:
             output.append("## " + sec.title)
@@ -14,6 +14,9 @@ from confopy.analysis import Analyzer
 class IntroductionRule(Rule):
     """Chapters must have introductions.
     """
+
+    targets = (Section, )
+
     def __init__(self, ID="introduction", language="de", brief="Kapiteleinleitungen", description="Kapitel müssen eine Einleitung haben"):
         super(IntroductionRule, self).__init__(ID, language, brief, description)
 
@@ -29,6 +32,9 @@ Analyzer.register(IntroductionRule())
 class SubsectionRule(Rule):
     """Sections must have at least 2 subsections or none at all.
     """
+
+    targets = (Section, )
+
     def __init__(self, ID="subsections", language="de", brief="Mind. 2 Unterabschnitte", description="Sektionen haben entweder 2 oder keine Untersektionen"):
         super(SubsectionRule, self).__init__(ID, language, brief, description)
 
@@ -44,6 +50,9 @@ Analyzer.register(SubsectionRule())
 class FloatReferenceRule(Rule):
     """Floating objects must be referenced in the surrounding text.
     """
+
+    targets = (Float, )
+
     def __init__(self,
                  ID="floatreference",
                  language="de",
@@ -63,6 +72,9 @@ Analyzer.register(FloatReferenceRule())
 class FloatReferenceBeforeRule(Rule):
     """Floating objects must be referenced in the text before their placement.
     """
+
+    targets = (Float, )
+
     def __init__(self,
                  ID="floatreferencebefore",
                  language="de",
@@ -82,6 +94,9 @@ Analyzer.register(FloatReferenceBeforeRule())
 class FloatCaptionRule(Rule):
     """Floating objects must have a caption.
     """
+
+    targets = (Float, )
+
     def __init__(self, ID="floatcaption", language="de", brief="Gleitobjekte-Beschriftung", description="Gleitobjekte müssen beschriftet sein"):
         super(FloatCaptionRule, self).__init__(ID, language, brief, description)
 
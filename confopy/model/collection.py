@@ -0,0 +1,203 @@
+# coding: utf-8
+'''
+File: collection.py
+Author: Oliver Zscheyge
+Description:
+    Lazy access to the Documents of large Confopy XML files.
+'''
+
+import mmap
+import os
+import re
+from pickle import dump, load
+
+from lxml import etree
+
+from confopy.model.document_converter import DocumentConverter
+
+
+# Start tag (group 1 is "/" for an empty element) or end tag of a document,
+# with or without attributes and namespace prefix
+_DOCUMENT_TAG = re.compile(br"<(?:[\w.-]+:)?document(?=[\s/>])[^>]*?(/?)>|</(?:[\w.-]+:)?document\s*>")
+
+
+class DocumentCollection(object):
+    """Sequence of the Documents in a Confopy XML file (<documents> or a
+    single <document>). The byte ranges of all <document> elements are
+    indexed once, Documents are only parsed when they are accessed:
+
+        docs = DocumentCollection("theses.xml")
+        len(docs)
+        docs[42]
+        for doc in docs[100:200]: ...
+
+    The index is kept in memory unless an index file is given, which is
+    then reused until the XML file changes.
+    """
+
+    # Increase whenever the layout of the index file changes
+    INDEX_VERSION = 1
+
+    def __init__(self, xml_path, index_path=None):
+        """Initializer.
+        Args:
+            xml_path:   Path of the Confopy XML file.
+            index_path: File to store the index in and to load it from
+                        in later runs. Default: None, keep the index in
+                        memory only.
+        """
+        super(DocumentCollection, self).__init__()
+        self.xml_path = xml_path
+        self.index_path = index_path
+        self._converter = DocumentConverter()
+        self._offsets = None
+
+    def _stamp(self):
+        stat = os.stat(self.xml_path)
+        return (DocumentCollection.INDEX_VERSION, stat.st_size, int(stat.st_mtime))
+
+    def offsets(self):
+        """Byte ranges of the <document> elements.
+        Return:
+            List of (start, end) tuples, end is exclusive.
+        """
+        if self._offsets is None:
+            self._offsets = self._load_index()
+            if self._offsets is None:
+                self._offsets = self._build_index()
+                self._save_index()
+        return self._offsets
+
+    def _load_index(self):
+        if self.index_path is None:
+            return None
+        try:
+            with open(self.index_path, "rb") as f:
+                data = load(f)
+            if data.get("stamp") == self._stamp():
+                return data["offsets"]
+        except Exception:
+            # Missing, outdated or unreadable index: rebuild
+            pass
+        return None
+
+    def _save_index(self):
+        if self.index_path is None:
+            return
+        data = {"stamp": self._stamp(), "offsets": self._offsets}
+        tmp_path = "%s.%d.tmp" % (self.index_path, os.getpid())
+        try:
+            with open(tmp_path, "wb") as f:
+                dump(data, f, -1)
+            os.rename(tmp_path, self.index_path)
+        except (IOError, OSError):
+            # E.g. read-only directory: keep the index in memory
+            pass
+
+    def _build_index(self):
+        offsets = list()
+        if os.path.getsize(self.xml_path) == 0:
+            return offsets
+        with open(self.xml_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                start = None
+                for match in _DOCUMENT_TAG.finditer(data):
+                    if match.group(0).startswith(b"</"):
+                        if start is not None:
+                            offsets.append((start, match.end()))
+                            start = None
+                    elif match.group(1):
+                        offsets.append((match.start(), match.end()))
+                    else:
+                        start = match.start()
+            finally:
+                data.close()
+        return offsets
+
+    def _parse(self, f, start, end):
+        f.seek(start)
+        elem = etree.fromstring(f.read(end - start))
+        return self._converter._parse_xml_document(elem)
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def __getitem__(self, index):
+        """Parses the Document(s) at the given position(s).
+        Args:
+            index: Integer or slice.
+        Return:
+            A Document or, for slices, a generator of Documents.
+        """
+        if isinstance(index, slice):
+            return self._iter(self.offsets()[index])
+        (start, end) = self.offsets()[index]
+        with open(self.xml_path, "rb") as f:
+            return self._parse(f, start, end)
+
+    def __iter__(self):
+        return self._iter(self.offsets())
+
+    def _iter(self, offsets):
+        with open(self.xml_path, "rb") as f:
+            for (start, end) in offsets:
+                yield self._parse(f, start, end)
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+    import shutil
+    import tempfile
+    from confopy.model.document import Document, Section, Paragraph, Meta
+
+    def make_doc(i):
+        doc = Document(meta=Meta(title="Doc %d <&>" % i, language="de"))
+        sec = Section(title="%d Kapitel" % i, number=str(i))
+        sec.add_child(Paragraph(text="Text %d über </document> Hasen." % i))
+        doc.add_child(sec)
+        return doc
+
+    dc = DocumentConverter()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "docs.xml")
+        with open(path, "wb") as f:
+            dc.write_XML(iter([make_doc(i) for i in range(5)]), f, pretty=True)
+
+        print("  Testing indexing and random access...")
+        docs = DocumentCollection(path)
+        assert len(docs) == 5
+        assert docs[3].meta.title == "Doc 3 <&>"
+        assert docs[-1].sections()[0].title == "4 Kapitel"
+        assert [d.sections()[0].number for d in docs[1:4]] == ["1", "2", "3"]
+        assert [dc.to_XML(d) for d in docs] == [dc.to_XML(d) for d in dc.to_Documents(path)]
+        assert os.listdir(tmp_dir) == ["docs.xml"]
+
+        print("  Testing stored index...")
+        index_path = os.path.join(tmp_dir, "docs.idx")
+        docs = DocumentCollection(path, index_path)
+        assert len(docs) == 5 and os.path.isfile(index_path)
+        assert DocumentCollection(path, index_path)._load_index() == docs.offsets()
+        with open(path, "wb") as f:
+            dc.write_XML(make_doc(7), f)
+        docs = DocumentCollection(path, index_path)
+        assert len(docs) == 1 and docs[0].meta.title == "Doc 7 <&>"
+
+        print("  Testing to_Documents with a list of files...")
+        assert len(dc.to_Documents([path, path])) == 2
+
+        print("  Testing document tags with attributes...")
+        path = os.path.join(tmp_dir, "attrs.xml")
+        with open(path, "wb") as f:
+            xml = dc.to_XML(make_doc(1)).split("?>", 1)[1].replace("<document>", '<document xmlns="">')
+            f.write(('<documents>%s<document\n  id="2"/><documents-meta/></documents>' % xml).encode("utf-8"))
+        docs = DocumentCollection(path)
+        assert len(docs) == 2
+        assert docs[0].meta.title == "Doc 1 <&>"
+        assert docs[1].sections() == []
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print("Passed all tests!")
@@ -14,8 +14,13 @@ from nltk import wordpunct_tokenize
 
 class Node(object):
     """Super class for all document components.
+    Tokenized text (see #words and #raw) is cached per node. The caches
+    of a node and its ancestors are invalidated whenever its text or
+    children change.
     """
 
+    _revision = 0
+
     def __init__(self, text="", pagenr="", parent=None, children=[]):
         """Initializer.
         Args:
@@ -24,12 +29,43 @@ class Node(object):
             parent:   Parent node.
             children: List of child nodes.
         """
-        self.text = text
-        self.pagenr = pagenr
+        self._cache = dict()
         self._parent = parent
         self._children = list(children)
         for c in self._children:
             c._parent = self
+        self.text = text
+        self.pagenr = pagenr
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        self._text = text
+        self._invalidate()
+
+    def revision(self):
+        """Returns a counter that is increased whenever the text of this
+        node or of one of its descendants changes.
+        """
+        return self._revision
+
+    def _invalidate(self):
+        """Drops the cached text of this node and all its ancestors.
+        """
+        node = self
+        while node is not None:
+            node._cache.clear()
+            node._revision += 1
+            node = node._parent
+
+    def __getstate__(self):
+        # Do not pickle cached text
+        state = self.__dict__.copy()
+        state["_cache"] = dict()
+        return state
 
     def parent(self):
         return self._parent
@@ -73,6 +109,7 @@ class Node(object):
             if relation == 1:
                 child._parent = self
                 self._children.append(child)
+                self._invalidate()
             elif relation < 1 and self._parent:
                 self.parent().add_child(child, relation + 1)
 
@@ -82,6 +119,7 @@ class Node(object):
         if child in self._children:
             child._parent = None
             self._children.remove(child)
+            self._invalidate()
 
     def sections(self):
         """Returns all children being section nodes.
@@ -138,16 +176,21 @@ class Node(object):
             recursive: Include text from non-leaf child nodes.
             ignore_floats: Ignore floats and footnotes.
         """
-        buf = list()
-        buf.append(self.text)
-        for c in self._children:
-            if c.is_section() and recursive:
-                buf.append(c.raw(True, ignore_floats))
-            elif (c.is_float() or c.is_footnote()) and not ignore_floats:
-                buf.append(c.raw(recursive, False))
-            else:
-                buf.append(c.raw(recursive, ignore_floats))
-        return " ".join(buf)
+        key = ("raw", recursive, ignore_floats)
+        raw = self._cache.get(key, None)
+        if raw is None:
+            buf = list()
+            buf.append(self.text)
+            for c in self._children:
+                if c.is_section() and recursive:
+                    buf.append(c.raw(True, ignore_floats))
+                elif (c.is_float() or c.is_footnote()) and not ignore_floats:
+                    buf.append(c.raw(recursive, False))
+                else:
+                    buf.append(c.raw(recursive, ignore_floats))
+            raw = " ".join(buf)
+            self._cache[key] = raw
+        return raw
 
     def words(self, recursive=True, ignore_floats=True):
         """Returns this node's text as a list of words.
@@ -157,15 +200,34 @@ class Node(object):
         Return:
             List of words.
         """
-        words = list()
-        words.extend(wordpunct_tokenize(self.text))
-        for c in self._children:
-            if c.is_section() and recursive:
-                words.extend(c.words(True, ignore_floats))
-            elif (c.is_float() or c.is_footnote()) and not ignore_floats:
-                words.extend(c.words(recursive, False))
-            else:
-                words.extend(c.words(recursive, ignore_floats))
+        return list(self._words(recursive, ignore_floats))
+
+    def _words(self, recursive, ignore_floats):
+        """Cached version of #words. The returned list must not be modified.
+        """
+        key = ("words", recursive, ignore_floats)
+        words = self._cache.get(key, None)
+        if words is None:
+            words = list()
+            words.extend(self.own_words())
+            for c in self._children:
+                if c.is_section() and recursive:
+                    words.extend(c._words(True, ignore_floats))
+                elif (c.is_float() or c.is_footnote()) and not ignore_floats:
+                    words.extend(c._words(recursive, False))
+                else:
+                    words.extend(c._words(recursive, ignore_floats))
+            self._cache[key] = words
+        return words
+
+    def own_words(self):
+        """Tokenized text of this node without its children (cached).
+        The returned list must not be modified.
+        """
+        words = self._cache.get("own_words", None)
+        if words is None:
+            words = wordpunct_tokenize(self.text)
+            self._cache["own_words"] = words
         return words
 
     def sents(self, recursive=True, ignore_floats=True, tokenizer=None):
@@ -421,4 +483,21 @@ Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id
     assert len(doc.words()) == 148
     assert len(doc.raw()) == 816
 
+    print("  Testing text cache invalidation...")
+    revision = doc.revision()
+    words = doc.words()
+    words.append("Foo")
+    assert len(doc.words()) == 148
+    para2 = Paragraph(text="Ein neuer Absatz.")
+    sec2.add_child(para2)
+    assert doc.revision() > revision
+    assert len(doc.words()) == 152
+    assert doc.raw().endswith("Ein neuer Absatz.")
+    para2.text = "Kurz."
+    assert len(doc.words()) == 150
+    assert len(sec2.words()) == 2
+    sec2.remove_child(para2)
+    assert len(doc.words()) == 148
+    assert len(doc.raw()) == 816
+
     print("Passed all tests!")
@@ -6,6 +6,8 @@ Description:
     Class for converting Document objects to other representations.
 '''
 
+from collections import OrderedDict
+
 from confopy.pdfextract.xml_util import escape
 from lxml import etree
 
@@ -36,7 +38,7 @@ class DocumentConverter(object):
         docs = list()
         if type(xml_paths) == list:
             for f in xml_paths:
-                docs.expand(self.to_Documents(f))
+                docs.extend(self.to_Documents(f))
         else:
             context = etree.iterparse(xml_paths, events=("end",), tag="document", encoding="utf-8")
             docs.extend(self._fast_iter(context, self._parse_xml_document))
@@ -162,7 +164,7 @@ class DocumentConverter(object):
                 author_xml = "%s%s<author>%s</author>" % (ident, PRETTY_IDENT, escape(author))
                 buf.append(author_xml)
             if doc.language != "":
-                lang = "%s%s<langauge>%s</language>" % (ident, PRETTY_IDENT, escape(doc.language))
+                lang = "%s%s<language>%s</language>" % (ident, PRETTY_IDENT, escape(doc.language))
                 buf.append(lang)
             buf.append(ident + "</meta>")
 
@@ -195,37 +197,125 @@ class DocumentConverter(object):
 
         return linesep.join(buf)
 
+    def write_XML(self, doc, fileobj, pretty=False):
+        """Streams a Document or multiple Documents as structure oriented
+        XML to a file. Unlike #to_XML the markup is written element by
+        element and never held in memory as a whole, Documents are
+        written (and can be released) one after another.
+        Args:
+            doc:     The Document or an iterable (e.g. generator) of
+                     Documents to write.
+            fileobj: File object opened in binary mode.
+            pretty:  Indent elements on separate lines. Texts are
+                     written unchanged.
+        """
+        linesep = "\n" if pretty else ""
+        step = PRETTY_IDENT if pretty else ""
+        with etree.xmlfile(fileobj, encoding="utf-8") as xf:
+            xf.write_declaration()
+            if isinstance(doc, Node):
+                self._write_node(xf, doc, linesep, "", step)
+            else:
+                with xf.element("documents"):
+                    for d in doc:
+                        self._write_text(xf, linesep + step)
+                        self._write_node(xf, d, linesep, step, step)
+                        xf.flush()
+                    self._write_text(xf, linesep)
+
+    def _write_node(self, xf, node, linesep, ident, step):
+        t = type(node)
+        if t == Document:
+            children = list(node.children())
+            if node.meta:
+                children.insert(0, node.meta)
+            with xf.element("document"):
+                self._write_children(xf, children, linesep, ident, step)
+
+        elif t == Meta:
+            items = list()
+            if node.title != "":
+                items.append(("title", node.title))
+            for author in node.authors:
+                items.append(("author", author))
+            if node.language != "":
+                items.append(("language", node.language))
+            with xf.element("meta"):
+                for (tag, text) in items:
+                    self._write_text(xf, linesep + ident + step)
+                    with xf.element(tag):
+                        self._write_text(xf, text)
+                if items:
+                    self._write_text(xf, linesep + ident)
+
+        elif t == Section or t == Chapter:
+            tag = "section" if t == Section else "chapter"
+            with xf.element(tag, self._section_attrib(node)):
+                self._write_children(xf, node.children(), linesep, ident, step)
+
+        elif t == Paragraph:
+            with xf.element("paragraph", self._paragraph_attrib(node)):
+                self._write_text(xf, node.text)
+
+        elif t == Float or t == Footnote:
+            tag = "float" if t == Float else "footnote"
+            with xf.element(tag, self._float_attrib(node)):
+                self._write_text(xf, node.text)
+
+    def _write_text(self, xf, text):
+        # xmlfile rejects empty strings
+        if text:
+            xf.write(text)
+
+    def _write_children(self, xf, children, linesep, ident, step):
+        for c in children:
+            self._write_text(xf, linesep + ident + step)
+            self._write_node(xf, c, linesep, ident + step, step)
+        if children:
+            self._write_text(xf, linesep + ident)
+
+    def _attrs(self, attrib):
+        return "".join([' %s="%s"' % (name, escape(value)) for (name, value) in attrib.items()])
+
     def _section_attrs(self, sec):
-        buf = list()
+        return self._attrs(self._section_attrib(sec))
+
+    def _paragraph_attrs(self, para):
+        return self._attrs(self._paragraph_attrib(para))
+
+    def _float_attrs(self, flt):
+        return self._attrs(self._float_attrib(flt))
+
+    def _section_attrib(self, sec):
+        attrib = OrderedDict()
         if sec.number != "":
-            buf.append(' number="%s"' % escape(sec.number))
-        buf.append(' title="%s"' % escape(sec.title))
+            attrib["number"] = sec.number
+        attrib["title"] = sec.title
         if sec.pagenr != "":
-            buf.append(' pagenr="%s"' % escape(sec.pagenr))
-        return "".join(buf)
+            attrib["pagenr"] = sec.pagenr
+        return attrib
 
-    def _paragraph_attrs(self, para):
-        buf = list()
+    def _paragraph_attrib(self, para):
+        attrib = OrderedDict()
         if para.pagenr != "":
-            buf.append(' pagenr="%s"' % escape(para.pagenr))
+            attrib["pagenr"] = para.pagenr
         if para.font != "":
-            buf.append(' font="%s"' % escape(para.font))
+            attrib["font"] = para.font
         if para.fontsize != "":
-            buf.append(' fontsize="%s"' % escape(para.fontsize))
+            attrib["fontsize"] = para.fontsize
         if len(para.emph) > 0:
             emph_str = EMPH_SEPARATOR.join(para.emph)
             if emph_str != "":
-                buf.append(' emph="%s"' % escape(emph_str))
-        return "".join(buf)
+                attrib["emph"] = emph_str
+        return attrib
 
-    def _float_attrs(self, flt):
-        buf = list()
+    def _float_attrib(self, flt):
+        attrib = OrderedDict()
         if flt.number != "":
-            buf.append(' number="%s"' % escape(flt.number))
+            attrib["number"] = flt.number
         if flt.pagenr != "":
-            buf.append(' pagenr="%s"' % escape(flt.pagenr))
-        return "".join(buf)
-
+            attrib["pagenr"] = flt.pagenr
+        return attrib
 
 
 if __name__ == '__main__':
@@ -264,4 +354,22 @@ Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id
     xml_expected = '<?xml version="1.0" encoding="utf-8" ?><document>  <paragraph>Intro text  </paragraph>  <section title="1. Foo">    <section title="1.1 Bar">      <paragraph>Lorem ipsum dolor sit amet, consectetur adipiscing elit. In lacinia nec massa id interdum. Ut dolor mauris, mollis quis sagittis at, viverra ac mauris. Phasellus pharetra dolor neque, sit amet ultricies nibh imperdiet lobortis. Fusce ac blandit ex, eu feugiat eros. Etiam nec erat enim. Fusce at metus ac dui sagittis laoreet. Nulla suscipit nisl ut lacus viverra, a vestibulum est lacinia. Aliquam finibus urna nunc, nec venenatis mi dictum eget. Etiam vitae ante quis neque aliquam vulputate id sit amet massa. Pellentesque elementum sapien non mauris laoreet cursus. Pellentesque at mauris id ipsum viverra egestas. Sed nec volutpat metus, vel sollicitudin ante. Pellentesque interdum justo vel ullamcorper dictum. Phasellus volutpat nibh eget arcu venenatis, a bibendum lorem mattis. Quisque in laoreet leo.      </paragraph>            <float>Tabelle 1: Foo bar.      </float>      <paragraph>Tabelle 1 zeigt Foobar.      </paragraph>    </section>    <section title="1.2 Baz">            <float>Tabelle 2: Foo bar baz bat.      </float>    </section>  </section>  <section title="2. Raboof">  </section></document>'
     assert xml == xml_expected
 
+    print("  Testing streaming XML writer...")
+    from io import BytesIO
+    doc.meta = Meta(title="T & T", authors=["A"], language="de")
+    para2.font = "Times"
+    para2.emph = ["Foobar", "zeigt"]
+    floatB.number = "2"
+    for pretty in [True, False]:
+        buf = BytesIO()
+        doc_conv.write_XML(iter([doc, Document()]), buf, pretty)
+        docs = doc_conv.to_Documents(BytesIO(buf.getvalue()))
+        assert len(docs) == 2
+        assert doc_conv.to_XML(docs[0]) == doc_conv.to_XML(doc)
+        assert docs[0].meta.title == "T & T" and docs[0].meta.language == "de"
+        assert docs[0].paragraphs()[2].emph == ["Foobar", "zeigt"]
+    buf = BytesIO()
+    doc_conv.write_XML(doc, buf)
+    assert doc_conv.to_XML(doc_conv.to_Documents(BytesIO(buf.getvalue()))) == doc_conv.to_XML([doc])
+
     print("Passed all tests!")
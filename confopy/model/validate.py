@@ -8,23 +8,151 @@ Description:
 '''
 
 import os.path as op
+from multiprocessing import Pool, cpu_count
 from lxml import etree
 
-def validate(files):
+import confopy.config as C
+
+
+XSD_PATH = "%s/confopy_document.xsd" % op.dirname(op.realpath(__file__))
+
+# Compiled XML schema, see #schema()
+_schema = None
+
+
+def schema():
+    """Returns the compiled XML schema of the Confopy data model. The XSD
+    is parsed and compiled once per process.
+    """
+    global _schema
+    if _schema is None:
+        _schema = etree.XMLSchema(etree.parse(XSD_PATH))
+    return _schema
+
+def validate_file(path, streaming=None):
+    """Validates a single XML file according to the Confopy data model.
+    Args:
+        path:      Path of the XML file.
+        streaming: Validate each <document> on its own while parsing the
+                   file instead of loading the whole file first.
+                   None: stream files larger than
+                   config.VALIDATE_STREAMING_SIZE.
+    Return:
+        Tuple (valid, errors): boolean and the error log (unicode string).
+    """
+    if streaming is None:
+        streaming = op.getsize(path) > C.VALIDATE_STREAMING_SIZE
+    xml_schema = schema()
+    try:
+        if not streaming:
+            valid = xml_schema.validate(etree.parse(path))
+            return (valid, str(xml_schema.error_log))
+        return _validate_streaming(path, xml_schema)
+    except etree.XMLSyntaxError as e:
+        return (False, str(e))
+
+def _validate_streaming(path, xml_schema):
+    errors = list()
+    context = etree.iterparse(path, events=("start", "end"))
+    depth = 0
+    root_tag = None
+    for (event, elem) in context:
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root_tag = elem.tag
+                if root_tag not in ("documents", "document"):
+                    errors.append("%s:%d: Unexpected root element '%s'." % (path, elem.sourceline, root_tag))
+                    break
+            elif depth == 2 and root_tag == "documents" and elem.tag != "document":
+                errors.append("%s:%d: Unexpected element '%s' in 'documents'." % (path, elem.sourceline, elem.tag))
+            continue
+        depth -= 1
+        if elem.tag == "document" and depth <= 1:
+            if not xml_schema.validate(elem):
+                errors.append(str(xml_schema.error_log))
+            # Release the validated document
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    del context
+    return (len(errors) == 0, "\n".join(errors))
+
+def _validate_file(args):
+    (path, streaming) = args
+    return validate_file(path, streaming)
+
+def validate(files, jobs=1, streaming=None):
     """Validates XML files according to the Confopy data model XML schema.
     Args:
-        files: A list of file paths. The XML documents to validate.
+        files:     A list of file paths. The XML documents to validate.
+        jobs:      Number of worker processes validating files in parallel.
+                   0 uses one process per CPU core.
+        streaming: See #validate_file.
     Return:
         A string message indicating the successful validation or listing all errors.
     """
-    xsd_path = "%s/confopy_document.xsd" % op.dirname(op.realpath(__file__))
+    tasks = [(f, streaming) for f in files]
+    if jobs < 1:
+        jobs = cpu_count()
+    jobs = min(jobs, len(tasks))
+    if jobs <= 1:
+        results = list(map(_validate_file, tasks))
+    else:
+        pool = Pool(jobs)
+        try:
+            results = pool.map(_validate_file, tasks, 1)
+        finally:
+            pool.close()
+            pool.join()
+
     output = ""
-    for f in files:
-        xsd_doc = etree.parse(xsd_path)
-        xml_schema = etree.XMLSchema(xsd_doc)
-        doc = etree.parse(f)
-        if xml_schema.validate(doc):
-            output = output + "%s is a valid instance of %s!\n" % (f, xsd_path)
+    for (f, (valid, errors)) in zip(files, results):
+        if valid:
+            output = output + "%s is a valid instance of %s!\n" % (f, XSD_PATH)
         else:
-            output = output + "%s is invalid according to %s!\n\nError(s):\n%s\n" % (f, xsd_path, xml_schema.error_log)
+            output = output + "%s is invalid according to %s!\n\nError(s):\n%s\n" % (f, XSD_PATH, errors)
     return output
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+    import os
+    import shutil
+    import tempfile
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        valid_path = op.join(tmp_dir, "valid.xml")
+        with open(valid_path, "w") as f:
+            f.write("<documents><document><section title=\"1\"><paragraph>a</paragraph></section></document>"
+                    "<document><chapter title=\"2\"/></document></documents>")
+        invalid_path = op.join(tmp_dir, "invalid.xml")
+        with open(invalid_path, "w") as f:
+            f.write("<documents><document><section title=\"1\"/></document>"
+                    "<document><section/></document></documents>")
+        broken_path = op.join(tmp_dir, "broken.xml")
+        with open(broken_path, "w") as f:
+            f.write("<documents><document>")
+
+        print("  Testing schema caching...")
+        assert schema() is schema()
+
+        for streaming in [False, True]:
+            print("  Testing validation (streaming: %s)..." % streaming)
+            assert validate_file(valid_path, streaming)[0]
+            (valid, errors) = validate_file(invalid_path, streaming)
+            assert not valid and "title" in errors
+            assert not validate_file(broken_path, streaming)[0]
+
+        print("  Testing parallel validation...")
+        files = [valid_path, invalid_path, broken_path, valid_path]
+        output = validate(files, jobs=2)
+        assert output == validate(files)
+        assert output.count("is a valid instance") == 2
+        assert output.count("is invalid") == 2
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print("Passed all tests!")
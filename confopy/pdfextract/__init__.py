@@ -3,4 +3,5 @@
 #from confopy.pdfextract.pdfminer_wrapper import *
 #from confopy.pdfextract.pdfminer_xml_bindings import *
 #from confopy.pdfextract.heuristics import *
-from confopy.pdfextract.convenience import PDF2XMLstring, PDF2pages, PDF2document, PDFs2documents
+from confopy.pdfextract.convenience import PDF2XMLstring, PDF2pages, PDF2document, PDFs2documents, PDFs2documents_iter
+from confopy.pdfextract.cache import DocumentCache
@@ -0,0 +1,176 @@
+# coding: utf-8
+'''
+File: cache.py
+Author: Oliver Zscheyge
+Description:
+    Persistent cache for Documents extracted from PDF files.
+'''
+
+import hashlib
+import os
+import os.path as op
+from pickle import dump, load, UnpicklingError
+from tempfile import mkstemp
+
+import confopy.config as C
+from confopy.pdfextract.pdfminer_wrapper import EXTRACTOR_VERSION
+from confopy.pdfextract.heuristics import HEURISTICS_VERSION
+
+
+class DocumentCache(object):
+    """Content addressed on-disk cache of extracted Documents.
+    Entries are keyed by the SHA-1 hash of the PDF file content, the cache
+    format and the versions of the extractor and the heuristics, so changed
+    files or a changed extraction never yield stale Documents.
+    The least recently used entries are evicted as soon as the cache
+    exceeds its maximum size.
+    """
+
+    SUFFIX = ".pkl"
+    # Increase whenever the pickled layout of the Document classes changes
+    FORMAT_VERSION = 2
+    _CHUNK_SIZE = 1 << 16
+
+    def __init__(self, directory=None, max_size=C.DOCUMENT_CACHE_SIZE):
+        """Initializer.
+        Args:
+            directory: Directory to store the cached Documents in.
+                       Default: "documents" in config.CACHE_DIR.
+            max_size:  Maximum size of the cache in bytes.
+        """
+        super(DocumentCache, self).__init__()
+        if directory is None:
+            directory = op.join(C.CACHE_DIR, "documents")
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, filepath):
+        """Computes the cache key of a PDF file.
+        Args:
+            filepath: Path of the PDF file.
+        Return:
+            String.
+        """
+        sha1 = hashlib.sha1()
+        with open(filepath, "rb") as f:
+            chunk = f.read(DocumentCache._CHUNK_SIZE)
+            while chunk:
+                sha1.update(chunk)
+                chunk = f.read(DocumentCache._CHUNK_SIZE)
+        return "%s_%s_%s_%s" % (sha1.hexdigest(), DocumentCache.FORMAT_VERSION,
+                                EXTRACTOR_VERSION, HEURISTICS_VERSION)
+
+    def get(self, key):
+        """Loads a cached Document.
+        Args:
+            key: Cache key, see #key(filepath).
+        Return:
+            The Document or None if it is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                doc = load(f)
+        except (IOError, OSError, EOFError, UnpicklingError):
+            return None
+        try:
+            # Mark entry as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        return doc
+
+    def put(self, key, doc):
+        """Stores a Document and evicts old entries if necessary.
+        Args:
+            key: Cache key, see #key(filepath).
+            doc: The Document to store.
+        """
+        try:
+            if not op.isdir(self.directory):
+                os.makedirs(self.directory)
+            # Write to a temporary file first: other processes must never
+            # read partially written entries.
+            (fd, tmp_path) = mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                dump(doc, f, -1)
+            os.rename(tmp_path, self._path(key))
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache
+        is not larger than max_size.
+        """
+        entries = list()
+        total_size = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(DocumentCache.SUFFIX):
+                path = op.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+        entries.sort()
+        for (mtime, size, path) in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+
+    def _path(self, key):
+        return op.join(self.directory, key + DocumentCache.SUFFIX)
+
+
+
+if __name__ == '__main__':
+    print("Test for %s" % __file__)
+    import shutil
+    import time
+    from tempfile import mkdtemp
+    from confopy.model.document import Document, Paragraph
+
+    tmp_dir = mkdtemp()
+    try:
+        pdf_a = op.join(tmp_dir, "a.pdf")
+        pdf_b = op.join(tmp_dir, "b.pdf")
+        with open(pdf_a, "wb") as f:
+            f.write(b"%PDF-1.4 A")
+        with open(pdf_b, "wb") as f:
+            f.write(b"%PDF-1.4 B")
+        doc = Document()
+        doc.add_child(Paragraph(text="Hallo Welt."))
+
+        print("  Testing keys...")
+        cache = DocumentCache(op.join(tmp_dir, "cache"))
+        key_a = cache.key(pdf_a)
+        assert key_a == cache.key(pdf_a)
+        assert key_a != cache.key(pdf_b)
+
+        print("  Testing get/put...")
+        assert cache.get(key_a) is None
+        cache.put(key_a, doc)
+        assert cache.get(key_a).words() == ["Hallo", "Welt", "."]
+
+        print("  Testing LRU eviction...")
+        entry_size = op.getsize(cache._path(key_a))
+        cache.max_size = entry_size
+        key_b = cache.key(pdf_b)
+        os.utime(cache._path(key_a), (time.time() - 60, time.time() - 60))
+        cache.put(key_b, doc)
+        assert cache.get(key_a) is None
+        assert cache.get(key_b) is not None
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print("Passed all tests!")
@@ -6,10 +6,13 @@ Description:
     Convenience functions for handling PDF conversions.
 '''
 
-from xml.dom.minidom import parseString
+from collections import deque
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool, cpu_count
 
+from confopy import instrument
 from confopy.pdfextract.pdfminer_wrapper import PDFMinerWrapper
-from confopy.pdfextract.pdfminer_xml_bindings import DOM2pages
 from confopy.pdfextract.heuristics import HeuristicManager
 
 
@@ -19,17 +22,80 @@ def PDF2XMLstring(filepath):
 
 def PDF2pages(filepath):
     pdfminer = PDFMinerWrapper()
-    xml_str = pdfminer.pdf2xml(filepath)
-    dom = parseString(xml_str)
-    return DOM2pages(dom)
+    with instrument.span("pdfminer"):
+        return pdfminer.pdf2pages(filepath)
 
-def PDF2document(filepath):
-    pdfminer = PDFMinerWrapper()
-    xml_str = pdfminer.pdf2xml(filepath)
-    dom = parseString(xml_str)
-    pages = DOM2pages(dom)
+def PDF2document(filepath, cache=None):
+    """Converts a PDF file to a Document.
+    Args:
+        filepath: Path of the PDF file to convert.
+        cache:    Optional DocumentCache. Consulted before the extraction
+                  and updated with newly extracted Documents.
+    Return:
+        Document.
+    """
+    key = None
+    if cache is not None:
+        with instrument.span("cache.get"):
+            key = cache.key(filepath)
+            doc = cache.get(key)
+        if doc is not None:
+            return doc
+    pages = PDF2pages(filepath)
     hm = HeuristicManager()
-    return hm.generate_document(pages)
+    with instrument.span("heuristics"):
+        doc = hm.generate_document(pages)
+    if cache is not None:
+        with instrument.span("cache.put"):
+            cache.put(key, doc)
+    return doc
+
+def PDFs2documents(filepaths, jobs=1, cache=None):
+    """Converts multiple PDF files to Documents.
+    Args:
+        filepaths: List of paths of the PDF files to convert.
+        jobs:      Number of worker processes converting the files in
+                   parallel. 0 uses one process per CPU core.
+                   1 converts all files in the current process (default).
+        cache:     Optional DocumentCache, see #PDF2document.
+    Return:
+        List of Documents in the same order as filepaths.
+    """
+    return list(PDFs2documents_iter(filepaths, jobs, cache))
+
+def PDFs2documents_iter(filepaths, jobs=1, cache=None):
+    """Like PDFs2documents, but yields the Documents one by one as they
+    are converted. At most 2 * jobs converted Documents are held back at
+    a time, so memory does not grow with the number of files.
+    Args:
+        filepaths: List of paths of the PDF files to convert.
+        jobs:      See #PDFs2documents.
+        cache:     See #PDFs2documents.
+    Return:
+        Generator of Documents in the same order as filepaths.
+    """
+    convert = partial(PDF2document, cache=cache)
+    if jobs < 1:
+        jobs = cpu_count()
+    jobs = min(jobs, len(filepaths))
+    if jobs <= 1:
+        for filepath in filepaths:
+            yield convert(filepath)
+        return
 
-def PDFs2documents(filepaths):
-    return list(map(PDF2document, filepaths))
+    pool = Pool(jobs)
+    try:
+        # Submit single files: PDFs differ a lot in size, keep all
+        # workers busy without converting far ahead of the consumer
+        pending = deque()
+        remaining = iter(filepaths)
+        for filepath in islice(remaining, 2 * jobs):
+            pending.append(pool.apply_async(convert, (filepath, )))
+        while pending:
+            doc = pending.popleft().get()
+            for filepath in islice(remaining, 1):
+                pending.append(pool.apply_async(convert, (filepath, )))
+            yield doc
+    finally:
+        pool.terminate()
+        pool.join()
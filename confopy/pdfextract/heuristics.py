@@ -11,9 +11,11 @@ import re
 
 from confopy.model.document import Node, Document, Section, Paragraph, Float, Footnote
 from confopy.model.document import DocumentChecker
-from confopy.model.lines import match, match_each, avg_word_length, lines2unicode, lines_using, words_using
+from confopy.model.lines import avg_word_length, lines2unicode, lines_using, words_using
 from confopy.pdfextract.pdfminer_xml_bindings import find_primary_font
 
+# Increase whenever a change alters the generated documents
+HEURISTICS_VERSION = 1
 
 class HeuristicRegExes(object):
     PAGE_NR = r"\d+"
@@ -135,6 +137,63 @@ class TextBoxType(object):
     def is_float(tb_type):
         return (tb_type >= TextBoxType.FLOAT and tb_type <= TextBoxType.PROOF)
 
+class TextBoxClassifier(object):
+    """Matches the text of a textbox against the precompiled regular
+    expressions of HeuristicRegExes. All float captions are tested with a
+    single alternation of named groups. The alternatives are tried in
+    order, so the first matching caption type wins just like testing the
+    patterns one after another.
+    """
+    _FLOAT_CAPS = [
+          ("FIGURE",     HeuristicRegExes.FIGURE_CAP,     TextBoxType.FIGURE)
+        , ("TABLE",      HeuristicRegExes.TABLE_CAP,      TextBoxType.TABLE)
+        , ("LISTING",    HeuristicRegExes.LISTING_CAP,    TextBoxType.LISTING)
+        , ("DEFINITION", HeuristicRegExes.DEFINITION_CAP, TextBoxType.DEFINITION)
+        , ("FORMULA",    HeuristicRegExes.FORMULA_CAP,    TextBoxType.FORMULA)
+        , ("THEOREM",    HeuristicRegExes.THEOREM_CAP,    TextBoxType.THEOREM)
+        , ("PROOF",      HeuristicRegExes.PROOF_CAP,      TextBoxType.PROOF)
+    ]
+    _FLOAT_CAP = re.compile("|".join(["(?P<%s>%s)" % (name, regex) for (name, regex, _) in _FLOAT_CAPS]), re.U)
+    _FLOAT_TYPES = dict([(name, tb_type) for (name, _, tb_type) in _FLOAT_CAPS])
+    _SECTION_NR = re.compile(HeuristicRegExes.SECTION_NR, re.U)
+    _LATEX_FOOTNOTE = re.compile(HeuristicRegExes.LATEX_FOOTNOTE, re.U)
+    _PAGE_NR = re.compile(HeuristicRegExes.PAGE_NR, re.U)
+
+    def text(self, tb):
+        """Joins the stripped lines of a textbox (see lines2unicode).
+        Compute once per textbox and pass it to the other methods.
+        """
+        return lines2unicode(tb.lines, True)
+
+    def float_type(self, text):
+        """Returns the TextBoxType of a float caption (e.g. FIGURE) or
+        TextBoxType.NONE if text is no caption.
+        """
+        m = TextBoxClassifier._FLOAT_CAP.match(text)
+        if m is None:
+            return TextBoxType.NONE
+        return TextBoxClassifier._FLOAT_TYPES[m.lastgroup]
+
+    def is_section_nr(self, text):
+        return TextBoxClassifier._SECTION_NR.match(text) is not None
+
+    def is_each_section_nr(self, lines):
+        """Like match_each(SECTION_NR, lines).
+        """
+        if lines == []:
+            return False
+        section_nr = TextBoxClassifier._SECTION_NR
+        for line in lines:
+            if section_nr.match(line) is None:
+                return False
+        return True
+
+    def is_latex_footnote(self, text):
+        return TextBoxClassifier._LATEX_FOOTNOTE.match(text) is not None
+
+    def is_page_nr(self, text):
+        return TextBoxClassifier._PAGE_NR.match(text) is not None
+
 class HeuristicManager(object):
     """HeuristicManager"""
     def __init__(self):
@@ -266,61 +325,54 @@ class SimpleDocumentHeuristic(Heuristic):
     """SimpleDocumentHeuristic."""
     def __init__(self):
         super(SimpleDocumentHeuristic, self).__init__(HeuristicType.COMPLEX)
+        self.classifier = TextBoxClassifier()
 
     def apply(self, pages=[], page=None, box=None, hints={}):
         if hints == {}:
             hints = dict()
         prim_font = find_primary_font(pages=pages)
+        cls = self.classifier
         for page in pages:
             for tb in page.textboxes:
 
                 line_count = len(tb.lines)
+                # Joined once, all patterns below match the same text
+                text = cls.text(tb)
 
                 # TOC, heading/page numbers and footnotes
-                if match_each(HeuristicRegExes.SECTION_NR, tb.lines):
+                if cls.is_each_section_nr(tb.lines):
                     if line_count > 1:
                         if (tb.word_count / float(line_count) > 1.0): # filter listing line numbering
                             hints[tb] = TextBoxType.TOC_LIST
                     else:
                         if tb.word_count > 1:
-                            if match(HeuristicRegExes.LATEX_FOOTNOTE, tb.lines, True) and lines_using(tb.lines, tb.emph, True) == 0:
+                            if cls.is_latex_footnote(text) and lines_using(tb.lines, tb.emph, True) == 0:
                                 hints[tb] = TextBoxType.FOOTNOTE
                             else:
                                 hints[tb] = TextBoxType.HEADING
                         else:
                             hints[tb] = TextBoxType.PAGE_NR_OR_HEADING_PART
                             #tb._print()
-                elif match(HeuristicRegExes.SECTION_NR, tb.lines, True):
-                    if match(HeuristicRegExes.LATEX_FOOTNOTE, tb.lines, True) and lines_using(tb.lines, tb.emph, True) == 0:
+                elif cls.is_section_nr(text):
+                    if cls.is_latex_footnote(text) and lines_using(tb.lines, tb.emph, True) == 0:
                         hints[tb] = TextBoxType.FOOTNOTE
                     else:
                         hints[tb] = TextBoxType.HEADING
 
                 # Floating objects
-                if match(HeuristicRegExes.FIGURE_CAP, tb.lines, True):
-                    hints[tb] = TextBoxType.FIGURE
-                elif match(HeuristicRegExes.TABLE_CAP, tb.lines, True):
-                    hints[tb] = TextBoxType.TABLE
-                elif match(HeuristicRegExes.LISTING_CAP, tb.lines, True):
-                    hints[tb] = TextBoxType.LISTING
-                elif match(HeuristicRegExes.DEFINITION_CAP, tb.lines, True):
-                    hints[tb] = TextBoxType.DEFINITION
-                elif match(HeuristicRegExes.FORMULA_CAP, tb.lines, True):
-                    hints[tb] = TextBoxType.FORMULA
-                elif match(HeuristicRegExes.THEOREM_CAP, tb.lines, True):
-                    hints[tb] = TextBoxType.THEOREM
-                elif match(HeuristicRegExes.PROOF_CAP, tb.lines, True):
-                    hints[tb] = TextBoxType.PROOF
+                float_type = cls.float_type(text)
+                if float_type != TextBoxType.NONE:
+                    hints[tb] = float_type
 
                 # Checks whether textbox is paragraph (main text content)
                 if tb.font[0] == prim_font[0] \
                    and tb.font[1] == prim_font[1] \
                    and avg_word_length(tb.lines) > 2 \
                    and (line_count and (tb.word_count / float(line_count)) > 1.8) \
-                   and not (tb.word_count == 1 and match(HeuristicRegExes.PAGE_NR, tb.lines, True)) \
+                   and not (tb.word_count == 1 and cls.is_page_nr(text)) \
                    and hints.get(tb, TextBoxType.NONE) != TextBoxType.FOOTNOTE:
                     hints[tb] = TextBoxType.PARAGRAPH
-                    if match(HeuristicRegExes.SECTION_NR, tb.lines, True):
+                    if cls.is_section_nr(text):
                         heading_line_count = lines_using(tb.lines, tb.emph, True)
                         if heading_line_count:
                             hints[tb] = TextBoxType.PARAGRAPH_WITH_HEADING
@@ -404,3 +456,16 @@ if __name__ == '__main__':
     assert res2 is None
     assert res3 is None
 
+    cls = TextBoxClassifier()
+    caps = [("Abbildung 3: Foo", TextBoxType.FIGURE), ("Tab. 2 Bar", TextBoxType.TABLE),
+            ("Source code 1", TextBoxType.LISTING), ("Def.4", TextBoxType.DEFINITION),
+            ("Formel 2", TextBoxType.FORMULA), ("Satz 1.2:", TextBoxType.THEOREM),
+            ("Beweis 3", TextBoxType.PROOF), ("Tabelle\xa01", TextBoxType.TABLE),
+            ("Bild", TextBoxType.NONE), ("Die Abbildung 3", TextBoxType.NONE)]
+    for (text, tb_type) in caps:
+        assert cls.float_type(text) == tb_type, text
+    assert cls.is_latex_footnote(footnote) and not cls.is_latex_footnote(nofootnote)
+    assert cls.is_section_nr(subs) and cls.is_page_nr("12") and not cls.is_page_nr("IV")
+    assert cls.is_each_section_nr(["1.", "2.3"]) and not cls.is_each_section_nr(["1.", "a"])
+    assert not cls.is_each_section_nr([])
+
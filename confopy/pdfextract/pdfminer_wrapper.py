@@ -13,6 +13,14 @@ from pdfminer.layout import LAParams
 from pdfminer.layout import LTChar
 from pdfminer.pdffont import PDFUnicodeNotDefined
 
+# For PageAggregator implementation:
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.layout import LTText, LTTextBox, LTTextLine, LTTextGroup
+from confopy.pdfextract.pdfminer_xml_bindings import Page, TextGroup, letters2textline, textlines2textbox
+
+
+# Increase whenever a change alters the extracted pages
+EXTRACTOR_VERSION = 2
 
 RE_XML_ILLEGAL = '([\u0000-\u0008\u000b-\u000c\u000e-\u001f\ufffe-\uffff])' + \
                     '|' + \
@@ -22,6 +30,8 @@ RE_XML_ILLEGAL = '([\u0000-\u0008\u000b-\u000c\u000e-\u001f\ufffe-\uffff])' + \
                     chr(0xd800),chr(0xdbff),chr(0xdc00),chr(0xdfff),
                     )
 RE_XML_ILLEGAL_ASCII = r"[\x01-\x09\x0B\x0C\x0E-\x1F\x7F]"
+_RE_XML_ILLEGAL = re.compile(RE_XML_ILLEGAL)
+_RE_XML_ILLEGAL_ASCII = re.compile(RE_XML_ILLEGAL_ASCII)
 
 
 class Options:
@@ -37,15 +47,12 @@ class Options:
         self.showpageno = True
         self.laparams = LAParams()
 
-class NoCidXMLConverter(XMLConverter):
+class _NoCidMixin(object):
     """
     Attempts to fix the (cid:<number>) errors produced by the original pdfminer implementation.
     See:
         http://stackoverflow.com/questions/16523767/what-is-this-cid51-in-the-output-of-pdf2txt
     """
-    def __init__(self, rsrcmgr, outfp, codec="utf-8", pageno=1, laparams=None, outdir=None):
-        super(NoCidXMLConverter, self).__init__(rsrcmgr, outfp, codec, pageno, laparams, outdir)
-
     def render_char(self, matrix, font, fontsize, scaling, rise, cid):
         try:
             text = font.to_unichr(cid)
@@ -62,6 +69,60 @@ class NoCidXMLConverter(XMLConverter):
         #print "Undefined: %r, %r" % (font, cid)
         return "(cid:%d)" % cid
 
+class NoCidXMLConverter(_NoCidMixin, XMLConverter):
+    """XMLConverter without (cid:<number>) errors. See _NoCidMixin.
+    """
+    def __init__(self, rsrcmgr, outfp, codec="utf-8", pageno=1, laparams=None, outdir=None):
+        super(NoCidXMLConverter, self).__init__(rsrcmgr, outfp, codec, pageno, laparams, outdir)
+
+class PageAggregator(_NoCidMixin, PDFLayoutAnalyzer):
+    """Builds Page objects (see pdfminer_xml_bindings) directly from the
+    layout objects pdfminer generates for each page.
+    Yields the same pages as converting the output of NoCidXMLConverter
+    with XML2pages, but skips serializing every character to XML and
+    parsing it again.
+    """
+    def __init__(self, rsrcmgr, pageno=1, laparams=None):
+        super(PageAggregator, self).__init__(rsrcmgr, pageno, laparams)
+        self.pages = list()
+
+    def receive_layout(self, ltpage):
+        self.pages.append(self._page(ltpage))
+
+    def _page(self, ltpage):
+        textboxes = [self._textbox(item) for item in ltpage if isinstance(item, LTTextBox)]
+        layout = None
+        if isinstance(ltpage.layout, LTTextGroup):
+            layout = self._textgroup(ltpage.layout)
+        return Page(str(ltpage.pageid), _bbox(ltpage.bbox), textboxes, layout)
+
+    def _textgroup(self, ltgroup):
+        # Like the <layout> section of the XML: textboxes without text
+        textboxes = [textlines2textbox(str(item.index), _bbox(item.bbox), [])
+                     for item in ltgroup if isinstance(item, LTTextBox)]
+        children = [self._textgroup(item) for item in ltgroup if isinstance(item, LTTextGroup)]
+        return TextGroup(_bbox(ltgroup.bbox), textboxes + children)
+
+    def _textbox(self, ltbox):
+        lines_fonts_sizes = [self._textline(item) for item in ltbox if isinstance(item, LTTextLine)]
+        return textlines2textbox(str(ltbox.index), _bbox(ltbox.bbox), lines_fonts_sizes)
+
+    def _textline(self, ltline):
+        letters = list()
+        for item in ltline:
+            if isinstance(item, LTChar):
+                text = _RE_XML_ILLEGAL_ASCII.sub("", _RE_XML_ILLEGAL.sub("", item.text))
+                letters.append((text, item.fontname, "%.3f" % item.size, True))
+            elif isinstance(item, LTText):
+                letters.append((item.text, "", "", False))
+        return letters2textline(letters)
+
+def _bbox(bbox):
+    """Rounds a bounding box to the 3 decimals pdfminer writes to its XML
+    output, see pdfminer_xml_bindings.str2bbox.
+    """
+    return tuple(float("%.3f" % v) for v in bbox)
+
 class _PDFMiner:
     def __init__(self, options=Options()):
         self.options = options
@@ -107,6 +168,14 @@ class _PDFMiner:
         out_buf.close()
         return result
 
+    def to_pages(self, fp):
+        device = PageAggregator( self.resmgr
+                               , laparams=self.options.laparams
+                               )
+        self._process(fp, device)
+        device.close()
+        return device.pages
+
     def to_xml(self, fp):
         out_buf = io.StringIO()
         device = NoCidXMLConverter( self.resmgr
@@ -157,6 +226,13 @@ class PDFMinerWrapper:
             result = conv.to_html(fp)
         return result
 
+    def pdf2pages(self, filename, options=Options()):
+        result = list()
+        with open(filename, "rb") as fp:
+            conv = _PDFMiner(options)
+            result = conv.to_pages(fp)
+        return result
+
     def pdf2xml(self, filename, options=Options()):
         result = ""
         with open(filename, "rb") as fp:
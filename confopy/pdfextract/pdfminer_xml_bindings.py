@@ -7,6 +7,8 @@ proper Python objects.
 import operator
 import unicodedata
 
+from lxml import etree
+
 from confopy.pdfextract import xml_util
 from functools import reduce
 
@@ -286,6 +288,24 @@ def DOM2pages(dom_document):
     return list(map(DOM2page, dom_pages))
 
 
+def XML2pages(xml_source):
+    """Streaming alternative to DOM2pages.
+    Parses the pdfminer XML incrementally and clears each page element
+    after its conversion, so only one page is kept in memory at a time.
+    Args:
+        xml_source: Path or (binary) file object of the pdfminer XML.
+    Return:
+        Generator yielding Page objects in document order.
+    """
+    context = etree.iterparse(xml_source, events=("end",), tag="page")
+    for event, elem in context:
+        yield etree2page(elem)
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    del context
+
+
 def str2bbox(bbstr):
     """Converts a bounding box string to the 4 corresponding float values
     Example:
@@ -320,21 +340,38 @@ def DOM2textline(dom_textline):
     the textline.
     """
     dom_letters = dom_textline.getElementsByTagName("text")
-    emph = list()
     letters = list()
+    for dom_letter in dom_letters:
+        letter = ""
+        if dom_letter.firstChild:
+            letter = dom_letter.firstChild.nodeValue
+        letters.append((letter,
+                        dom_letter.getAttribute("font"),
+                        dom_letter.getAttribute("size"),
+                        dom_letter.hasAttributes()))
+    return letters2textline(letters)
+
+def letters2textline(letters):
+    """Converts the letters of a textline to a tuple.
+    Args:
+        letters: Iterable of (text, font, size, has_attributes) tuples,
+                 one for each pdfminer text element of the textline.
+                 has_attributes is False for the spaces and newlines
+                 pdfminer inserts during layout analysis.
+    Return:
+        (line, fonts, sizes) tuple: the textline as a string and the font
+        and font size of each of its characters.
+    """
+    letters_buf = list()
     fonts = list()
     sizes = list()
     font = ""
     size = ""
     next_letter_uml = False
-    for dom_letter in dom_letters:
-        letter = ""
-        if dom_letter.firstChild:
-            letter = dom_letter.firstChild.nodeValue
-
-        if dom_letter.hasAttributes() or letter.strip() != "":
-            font = str(dom_letter.getAttribute("font"))
-            size = str(dom_letter.getAttribute("size"))
+    for (letter, letter_font, letter_size, has_attrs) in letters:
+        if has_attrs or letter.strip() != "":
+            font = str(letter_font)
+            size = str(letter_size)
             #if re.match(PDFMINER_CID, letter):
             #    print "FOUND CID: %s" % letter
             letter = _escape_pdfminer_cid(letter)
@@ -345,14 +382,14 @@ def DOM2textline(dom_textline):
                     letter = _convert2uml(letter)
                     next_letter_uml = False
                 for c in letter:
-                    letters.append(str(c))
+                    letters_buf.append(str(c))
                     fonts.append(font)
                     sizes.append(size)
         else:
-            letters.append(" ")
+            letters_buf.append(" ")
             fonts.append(font)
             sizes.append(size)
-    line = "".join(letters)
+    line = "".join(letters_buf)
     #emph = find_emphasis(line, fonts, sizes)
     return (line, fonts, sizes)
 
@@ -377,7 +414,18 @@ def DOM2textbox(dom_textbox):
     ID = str(dom_textbox.getAttribute("id"))
     bbox = str2bbox(dom_textbox.getAttribute("bbox"))
     dom_lines = dom_textbox.getElementsByTagName("textline")
-    lines_fonts_sizes = list(map(DOM2textline, dom_lines))
+    return textlines2textbox(ID, bbox, list(map(DOM2textline, dom_lines)))
+
+def textlines2textbox(ID, bbox, lines_fonts_sizes):
+    """Creates a TextBox.
+    Args:
+        ID:                ID of the textbox.
+        bbox:              Bounding box of the textbox.
+        lines_fonts_sizes: List of (line, fonts, sizes) tuples as returned
+                           by letters2textline.
+    Return:
+        TextBox.
+    """
     lines = [t[0] for t in lines_fonts_sizes]
     fonts = [t[1] for t in lines_fonts_sizes]
     sizes = [t[2] for t in lines_fonts_sizes]
@@ -501,6 +549,40 @@ def DOM2page(dom_page):
     return Page(page_id, page_bbox, textboxes, layout)
 
 
+## lxml functions (see XML2pages)
+
+def etree2textline(elem_textline):
+    letters = [(e.text or "", e.get("font", ""), e.get("size", ""), len(e.attrib) > 0)
+               for e in elem_textline.iter("text")]
+    return letters2textline(letters)
+
+def etree2textbox(elem_textbox):
+    ID = str(elem_textbox.get("id", ""))
+    bbox = str2bbox(elem_textbox.get("bbox"))
+    lines_fonts_sizes = list(map(etree2textline, elem_textbox.iter("textline")))
+    return textlines2textbox(ID, bbox, lines_fonts_sizes)
+
+def etree2textgroup(elem_textgroup):
+    bbox = str2bbox(elem_textgroup.get("bbox"))
+    textboxes = list(map(etree2textbox, elem_textgroup.findall("textbox")))
+    children = list(map(etree2textgroup, elem_textgroup.findall("textgroup")))
+    return TextGroup(bbox, textboxes + children)
+
+def etree2page(elem_page):
+    page_id = str(elem_page.get("id"))
+    page_bbox = str2bbox(elem_page.get("bbox"))
+    textboxes = list(map(etree2textbox, elem_page.findall("textbox")))
+
+    layout = None
+    elem_layout = elem_page.find("layout")
+    if elem_layout is not None:
+        textgroups = list(map(etree2textgroup, elem_layout.findall("textgroup")))
+        if len(textgroups):
+            layout = textgroups[0]
+
+    return Page(page_id, page_bbox, textboxes, layout)
+
+
 ## Analysis functions
 
 def find_primary_font(textboxes=[], pages=[]):
@@ -0,0 +1,326 @@
+#!/usr/bin/python -OO
+# coding: utf-8
+'''
+File: benchmark.py
+Author: Oliver Zscheyge
+Description:
+    Benchmarks PDF extraction, heuristics, metrics, rules and reports on
+    synthetic PDFs and Documents. Runs offline, writes the timings as
+    JSON and compares them with a previous run to flag regressions.
+
+    Usage:
+        python -m confopy.test.benchmark -o bench.json
+        python -m confopy.test.benchmark -b bench.json
+'''
+
+import argparse as AP
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from confopy.model import Document, Section, Paragraph, Float
+from confopy.analysis import Analyzer, AnalysisContext, SpellChecker
+from confopy.analysis.rule import eval_doc
+from confopy.localization import load_language
+from confopy.localization.de.morphology import MORPHOLOGY
+from confopy.localization.de.reports import METRIC_NAMES, RULE_NAMES
+
+
+WORDS = ["der", "die", "das", "und", "wir", "man", "wird", "werden", "sehr",
+         "Beispiel", "Hase", "Fuchs", "springt", "liegt", "enthalten", "Daten",
+         "Ergebnis", "Methode", "zeigt", "beschreibt", "schnell", "Analyse",
+         "Verfahren", "Abschnitt", "Messung", "gut", "auch", "nicht", "mit"]
+
+# Reports comparing documents with the language corpus
+CORPUS_REPORTS = ["docsavg"]
+
+# Default relative slowdown (0.2 = 20%) reported as regression
+THRESHOLD = 0.2
+
+
+# Synthetic input
+
+def _sentence(rnd):
+    words = [rnd.choice(WORDS) for _ in range(rnd.randint(4, 18))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rnd.choice([".", ".", ".", "!", "?"])
+
+def _paragraph(rnd, sentences=5):
+    return " ".join([_sentence(rnd) for _ in range(sentences)])
+
+def synthetic_document(chapters=8, sections=3, paragraphs=6, seed=0):
+    """Builds a Document with numbered chapters, sections, paragraphs and
+    referenced floats.
+    Args:
+        chapters:   Number of chapters.
+        sections:   Number of sections per chapter.
+        paragraphs: Number of paragraphs per section.
+        seed:       Seed of the random text generator.
+    Return:
+        Document.
+    """
+    rnd = random.Random(seed)
+    doc = Document()
+    fig = 0
+    for c in range(1, chapters + 1):
+        chapter = Section(title="%d Kapitel" % c, number=str(c))
+        chapter.add_child(Paragraph(text=_paragraph(rnd)))
+        for s in range(1, sections + 1):
+            section = Section(title="%d.%d Abschnitt" % (c, s), number="%d.%d" % (c, s))
+            for p in range(paragraphs):
+                text = _paragraph(rnd)
+                if p % 3 == 1:
+                    fig += 1
+                    text += " Abbildung %d zeigt das Ergebnis." % fig
+                    section.add_child(Paragraph(text=text))
+                    section.add_child(Float(text="Abbildung %d: Ergebnis der Messung." % fig))
+                else:
+                    section.add_child(Paragraph(text=text))
+            chapter.add_child(section)
+        doc.add_child(chapter)
+    return doc
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _pdf_page_content(lines):
+    buf = list()
+    for (font, size, x, y, text) in lines:
+        buf.append("BT /%s %d Tf %d %d Td (%s) Tj ET" % (font, size, x, y, _pdf_escape(text)))
+    return "\n".join(buf).encode("latin-1")
+
+def synthetic_pdf(filepath, chapters=4, paragraphs=6, seed=0):
+    """Writes a PDF with numbered headings (bold, large) and paragraphs
+    (regular, small), one chapter per page. Needs no PDF library.
+    Args:
+        filepath:   Path of the PDF file to write.
+        chapters:   Number of chapters (pages).
+        paragraphs: Number of paragraphs per chapter.
+        seed:       Seed of the random text generator.
+    """
+    rnd = random.Random(seed)
+    pages = list()
+    for c in range(1, chapters + 1):
+        lines = [("F2", 16, 72, 760, "%d Kapitel %d" % (c, c))]
+        y = 730
+        for _ in range(paragraphs):
+            words = _paragraph(rnd, 3).split(" ")
+            while words and y > 60:
+                line = words[:12]
+                words = words[12:]
+                lines.append(("F1", 10, 72, y, " ".join(line)))
+                y -= 12
+            y -= 12
+        lines.append(("F1", 10, 300, 40, str(c)))
+        pages.append(_pdf_page_content(lines))
+
+    # Objects: 1 catalog, 2 pages, 3/4 fonts, then (page, content) pairs
+    objects = [None, None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>"]
+    kids = list()
+    for content in pages:
+        page_nr = len(objects) + 1
+        kids.append("%d 0 R" % page_nr)
+        objects.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                        "/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+                        "/Contents %d 0 R >>" % (page_nr + 1)).encode("latin-1"))
+        objects.append(b"<< /Length " + str(len(content)).encode("latin-1") + b" >>\nstream\n" + content + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = ("<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(kids), len(kids))).encode("latin-1")
+
+    out = [b"%PDF-1.4\n"]
+    offsets = list()
+    length = len(out[0])
+    for (i, obj) in enumerate(objects):
+        chunk = ("%d 0 obj\n" % (i + 1)).encode("latin-1") + obj + b"\nendobj\n"
+        offsets.append(length)
+        out.append(chunk)
+        length += len(chunk)
+    out.append(("xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)).encode("latin-1"))
+    for offset in offsets:
+        out.append(("%010d 00000 n \n" % offset).encode("latin-1"))
+    out.append(("trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(objects) + 1, length)).encode("latin-1"))
+    with open(filepath, "wb") as f:
+        f.write(b"".join(out))
+
+
+# Timing
+
+def timeit(func, repeat=3, setup=None):
+    """Runs func repeat times.
+    Args:
+        func:   Function to time. Gets the return value of setup as
+                argument if setup is given.
+        repeat: Number of runs.
+        setup:  Function preparing each run (not timed).
+    Return:
+        Dict with the minimum and mean run time in seconds.
+    """
+    times = list()
+    for _ in range(repeat):
+        if setup is not None:
+            arg = setup()
+            start = time.perf_counter()
+            func(arg)
+        else:
+            start = time.perf_counter()
+            func()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "mean": sum(times) / len(times)}
+
+def clear_caches(lang="de"):
+    """Empties the caches shared between runs (statistics of document
+    nodes, tagged words, spell check results and verb lemmata), so each
+    run starts cold. The synthetic documents reuse a small vocabulary and
+    would otherwise be served from the caches after the first run.
+    """
+    AnalysisContext.clear()
+    for corpus in Analyzer.instance(lang).corpora().values():
+        corpus.clear_cache()
+    SpellChecker.clear_all()
+    MORPHOLOGY.clear_cache()
+
+def _fresh_document(size, lang="de"):
+    def setup():
+        clear_caches(lang)
+        return synthetic_document(chapters=size, seed=size)
+    return setup
+
+def _fresh_documents(size, count=2, lang="de"):
+    # Distinct documents, so multi document reports compare different texts
+    def setup():
+        clear_caches(lang)
+        return [synthetic_document(chapters=size, seed=size + i) for i in range(count)]
+    return setup
+
+class _ReportArgs(object):
+    latex = False
+
+def run(repeat=3, size=8, lang="de", pdf=True, reports=True, corpus=True):
+    """Runs all benchmarks.
+    Args:
+        repeat:  Number of runs per benchmark.
+        size:    Number of chapters of the synthetic documents.
+        lang:    Language of the metrics, rules and reports to benchmark.
+        pdf:     Benchmark PDF extraction and heuristics.
+        reports: Benchmark reports.
+        corpus:  Load the corpus of the language. Without a corpus the
+                 metrics skip sentence splitting and POS tagging.
+    Return:
+        Dict mapping benchmark names to timings (see #timeit).
+    """
+    results = dict()
+    if pdf:
+        # Imported here: the benchmarks of the analysis work without pdfminer
+        from confopy.pdfextract import PDF2pages, PDF2document
+        from confopy.pdfextract.heuristics import HeuristicManager
+        (fd, pdf_path) = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            synthetic_pdf(pdf_path, chapters=size)
+            results["extract.PDF2document"] = timeit(lambda: PDF2document(pdf_path), repeat)
+            pages = PDF2pages(pdf_path)
+            results["heuristics.generate_document"] = timeit(lambda: HeuristicManager().generate_document(pages), repeat)
+        finally:
+            os.remove(pdf_path)
+
+    load_language(lang, not corpus)
+    A = Analyzer.instance(lang)
+    setup = _fresh_document(size, lang)
+    for ID in METRIC_NAMES:
+        metric = A.get(metric=ID)
+        if metric is not None:
+            results["metric." + ID] = timeit(metric.evaluate, repeat, setup)
+
+    rules = [A.get(rule=ID) for ID in RULE_NAMES if A.get(rule=ID) is not None]
+    results["rules.eval_doc"] = timeit(lambda doc: eval_doc(doc, rules), repeat, setup)
+
+    if reports:
+        setup = _fresh_documents(size, lang=lang)
+        for (ID, report) in sorted(A.reports().items()):
+            if not corpus and ID in CORPUS_REPORTS:
+                continue
+            results["report." + ID] = timeit(lambda docs: report.execute(docs, _ReportArgs()), repeat, setup)
+    return results
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Compares benchmark results with a baseline.
+    Args:
+        results:   Dict of timings, see #run.
+        baseline:  Dict of timings of a previous run.
+        threshold: Relative slowdown of the minimum run time that is
+                   reported as regression.
+    Return:
+        Tuple (lines, regressions): list of unicode strings describing
+        each benchmark and list of names of regressed benchmarks.
+    """
+    lines = list()
+    regressions = list()
+    for name in sorted(results):
+        new = results[name]["min"]
+        old = baseline.get(name, {}).get("min", None)
+        if old is None or old <= 0.0:
+            lines.append("  %s %.4fs (new)" % (name.ljust(32), new))
+            continue
+        change = new / old - 1.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        lines.append("  %s %.4fs %+6.1f%%%s" % (name.ljust(32), new, 100.0 * change, flag))
+    return (lines, regressions)
+
+
+
+if __name__ == '__main__':
+    parser = AP.ArgumentParser(description="Benchmarks Confopy on synthetic PDFs and documents.")
+    parser.add_argument("-b", "--baseline", type=str, default="",
+                        help="JSON file of a previous run to compare with.")
+    parser.add_argument("-o", "--outfile", type=str, default="",
+                        help="File to write the results to (JSON).")
+    parser.add_argument("-n", "--repeat", type=int, default=3,
+                        help="Runs per benchmark. Default: 3")
+    parser.add_argument("-s", "--size", type=int, default=8,
+                        help="Number of chapters of the synthetic documents. Default: 8")
+    parser.add_argument("-t", "--threshold", type=float, default=THRESHOLD,
+                        help="Relative slowdown reported as regression. Default: %s" % THRESHOLD)
+    parser.add_argument("--no-pdf", action="store_true", default=False,
+                        help="Skip the PDF extraction and heuristics benchmarks.")
+    parser.add_argument("--no-corpus", action="store_true", default=False,
+                        help="Do not load the language corpus (e.g. TIGER).")
+    parser.add_argument("--no-reports", action="store_true", default=False,
+                        help="Skip the report benchmarks.")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.size, pdf=not args.no_pdf,
+                  reports=not args.no_reports, corpus=not args.no_corpus)
+    data = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "size": args.size,
+            "corpus": not args.no_corpus,
+        },
+        "results": results,
+    }
+    if args.outfile != "":
+        with open(args.outfile, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    baseline = dict()
+    if args.baseline != "":
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", dict())
+    (lines, regressions) = compare(results, baseline, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print("%d regression(s) above %.0f%%" % (len(regressions), 100.0 * args.threshold))
+        sys.exit(1)
@@ -0,0 +1,51 @@
+#!/usr/bin/python -OO
+# coding: utf-8
+
+import unittest
+
+from confopy.analysis import Analyzer, AnalysisContext, Corpus
+from confopy.model.document import Paragraph
+import confopy.localization.de.metrics
+
+class _Tagger(object):
+    def tag(self, words):
+        return [(w, "VVFIN" if w.islower() else "NN") for w in words]
+
+class _Corpus(Corpus):
+    """ TIGER stand-in with a tagger but without sentence tokenizer. """
+
+    def __init__(self):
+        super(_Corpus, self).__init__("TIGER", "de")
+        self._tagger = _Tagger()
+
+    def tagger(self, include_edgelabels=True):
+        return self._tagger
+
+class TestMetrics(unittest.TestCase):
+    """ Unit tests for the German metrics. """
+
+    def setUp(self):
+        self.analyzer = Analyzer.instance("de")
+        self.tiger = self.analyzer.get(corpus="TIGER")
+        Analyzer.register(_Corpus())
+        AnalysisContext.clear()
+
+    def tearDown(self):
+        if self.tiger is None:
+            del self.analyzer._corpora["TIGER"]
+        else:
+            Analyzer.register(self.tiger)
+        AnalysisContext.clear()
+
+    def test_DeadVerbsMetric_without_sentences(self):
+        """ Nodes with words but no sentences (no sentence tokenizer). """
+        metric = self.analyzer.get(metric="deadverbs")
+        node = Paragraph(text="Die Tabelle enthält alle Werte")
+        ctx = AnalysisContext.of(node, self.analyzer.get(corpus="TIGER"))
+        self.assertEqual(ctx.sent_lengths(), [])
+        self.assertEqual(ctx.tag_counts()["VVFIN"], 2)
+        self.assertEqual(metric.evaluate(node), 0.0)
+        self.assertEqual(metric.evaluate(Paragraph(text="")), 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,64 @@
 # coding: utf-8
 
 import unittest
+from io import BytesIO
+from xml.dom.minidom import parseString
 
 from confopy.pdfextract.pdfminer_wrapper import *
+from pdfminer.layout import LTPage, LTTextBox, LTTextLine, LTTextGroup, LTChar, LTAnno
+from confopy.pdfextract.pdfminer_xml_bindings import DOM2pages, XML2pages, TextGroup
 
 TEST_FILE = "./confopy/test/data/test_doc.pdf"
+TEST_XML = b"""<?xml version="1.0" encoding="utf-8" ?>
+<pages>
+<page id="1" bbox="0.000,0.000,595.000,842.000" rotate="0">
+<textbox id="0" bbox="10.000,700.000,200.000,720.000">
+<textline bbox="10.000,700.000,200.000,720.000">
+<text font="Times" bbox="10.000,700.000,15.000,720.000" size="10.000">1</text>
+<text> </text>
+<text font="Times-Bold" bbox="20.000,700.000,25.000,720.000" size="12.000">A</text>
+<text font="Times-Bold" bbox="25.000,700.000,30.000,720.000" size="12.000">b</text>
+<text>
+</text>
+</textline>
+</textbox>
+<layout>
+<textgroup bbox="10.000,700.000,200.000,720.000">
+<textbox id="0" bbox="10.000,700.000,200.000,720.000" />
+</textgroup>
+</layout>
+</page>
+<page id="2" bbox="0.000,0.000,595.000,842.000" rotate="0">
+</page>
+</pages>
+"""
+
+def _lt(cls, children=(), **attrs):
+    """Creates a pdfminer layout object without running its initializer.
+    """
+    obj = cls.__new__(cls)
+    obj._objs = list(children)
+    obj.__dict__.update(attrs)
+    return obj
+
+def _char(text, font, size, x):
+    return _lt(LTChar, text=text, fontname=font, size=size, bbox=(x, 700.0, x + 5.0, 720.0))
+
+# The layout objects pdfminer generates for TEST_XML, with unrounded
+# bounding boxes
+TEST_LTPAGES = [
+    _lt(LTPage, pageid=1, bbox=(0.0, 0.0, 595.0001, 842.0),
+        children=[_lt(LTTextBox, index=0, bbox=(10.0004, 699.9996, 200.0, 720.0),
+                      children=[_lt(LTTextLine, bbox=(10.0, 700.0, 200.0, 720.0),
+                                    children=[_char("1", "Times", 10.0, 10.0),
+                                              _lt(LTAnno, text=" "),
+                                              _char("A", "Times-Bold", 12.0, 20.0),
+                                              _char("b", "Times-Bold", 12.0, 25.0),
+                                              _lt(LTAnno, text="\n")])])],
+        layout=_lt(LTTextGroup, bbox=(10.0, 700.0, 200.0, 720.0002),
+                   children=[_lt(LTTextBox, index=0, bbox=(10.0004, 699.9996, 200.0, 720.0))])),
+    _lt(LTPage, pageid=2, bbox=(0.0, 0.0, 595.0, 842.0), layout=None),
+]
 
 class TestPdfextract(unittest.TestCase):
     """ Unit tests for pdfconvert. """
@@ -22,6 +76,49 @@ This is a test PDF document. \
 """.strip()
         self.assertEqual(result, expected)
 
+    def test_XML2pages(self):
+        """ Streaming page builder yields the same pages as DOM2pages. """
+        dom_pages = DOM2pages(parseString(TEST_XML))
+        pages = list(XML2pages(BytesIO(TEST_XML)))
+        self.assertEqual(len(pages), len(dom_pages))
+        for (page, dom_page) in zip(pages, dom_pages):
+            self.assertEqual(page.ID, dom_page.ID)
+            self.assertEqual(page.prim_font, dom_page.prim_font)
+            self.assertEqual([tb.lines for tb in page.textboxes],
+                             [tb.lines for tb in dom_page.textboxes])
+            self.assertEqual([tb.emph for tb in page.textboxes],
+                             [tb.emph for tb in dom_page.textboxes])
+        self.assertEqual(pages[0].textboxes[0].lines, ["1 Ab"])
+        self.assertTrue(pages[0].is_sibling(pages[0].textboxes[0], pages[0].textboxes[0]))
+
+    def assertSameBoxes(self, box, xml_box):
+        self.assertEqual(type(box), type(xml_box))
+        self.assertEqual(box.bbox, xml_box.bbox)
+        if isinstance(box, TextGroup):
+            self.assertEqual(len(box.children), len(xml_box.children))
+            for (child, xml_child) in zip(box.children, xml_box.children):
+                self.assertSameBoxes(child, xml_child)
+        else:
+            self.assertEqual((box.ID, box.lines, box.font, box.emph, box.word_count),
+                             (xml_box.ID, xml_box.lines, xml_box.font, xml_box.emph, xml_box.word_count))
+
+    def test_PageAggregator(self):
+        """ Pages built from layout objects equal the pages of the XML path. """
+        aggregator = PageAggregator(PDFResourceManager())
+        for ltpage in TEST_LTPAGES:
+            aggregator.receive_layout(ltpage)
+        xml_pages = list(XML2pages(BytesIO(TEST_XML)))
+        self.assertEqual(len(aggregator.pages), len(xml_pages))
+        for (page, xml_page) in zip(aggregator.pages, xml_pages):
+            self.assertEqual((page.ID, page.bbox, page.prim_font, page.word_count),
+                             (xml_page.ID, xml_page.bbox, xml_page.prim_font, xml_page.word_count))
+            self.assertEqual(len(page.textboxes), len(xml_page.textboxes))
+            for (tb, xml_tb) in zip(page.textboxes, xml_page.textboxes):
+                self.assertSameBoxes(tb, xml_tb)
+            self.assertEqual(page.layout is None, xml_page.layout is None)
+            if page.layout is not None:
+                self.assertSameBoxes(page.layout, xml_page.layout)
+
 if __name__ == "__main__":
     unittest.main()
 
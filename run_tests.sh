@@ -2,13 +2,25 @@
 
 export PYTHONPATH=$PYTHONPATH:./:confopy/
 
+python confopy/model/binary.py
+python confopy/model/collection.py
 python confopy/model/lines.py
 python confopy/model/document.py
 python confopy/model/document_converter.py
+python confopy/model/validate.py
 
 python confopy/analysis/analyzer.py
+python confopy/analysis/context.py
+python confopy/analysis/lrucache.py
+python confopy/analysis/reference.py
 python confopy/analysis/rule.py
 python confopy/analysis/spellcheck.py
 python confopy/analysis/statistics.py
 
+python confopy/instrument.py
+
+python confopy/localization/de/morphology.py
+
+python confopy/pdfextract/cache.py
 python confopy/test/test_pdfextract.py
+python confopy/test/test_metrics.py